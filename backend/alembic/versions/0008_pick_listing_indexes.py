@@ -0,0 +1,28 @@
+"""pick listing indexes
+
+Revision ID: 0008_pick_listing_indexes
+Revises: 0007_phase5_6_eval_calibration
+Create Date: 2026-03-02 09:00:00
+
+"""
+
+from typing import Sequence
+
+from alembic import op
+
+revision: str = "0008_pick_listing_indexes"
+down_revision: str | None = "0007_phase5_6_eval_calibration"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_picks_created_at_id", "picks", ["created_at", "id"])
+    op.create_index(
+        "ix_pick_scores_pick_version_scored_at", "pick_scores", ["pick_id", "version", "scored_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_pick_scores_pick_version_scored_at", table_name="pick_scores")
+    op.drop_index("ix_picks_created_at_id", table_name="picks")
@@ -26,6 +26,7 @@ class Settings:
     kelly_multiplier: float
     kelly_max_cap: float
     delta_hash_strict: bool
+    ingest_max_workers: int
     enable_scheduler: bool
     sched_ingest_interval_sec: int
     sched_picks_interval_sec: int
@@ -128,6 +129,7 @@ def get_settings() -> Settings:
         kelly_multiplier=_float_env("KELLY_MULTIPLIER", 0.25),
         kelly_max_cap=_float_env("KELLY_MAX_CAP", 0.05),
         delta_hash_strict=_bool_env("DELTA_HASH_STRICT", True),
+        ingest_max_workers=_int_env("INGEST_MAX_WORKERS", 1),
         enable_scheduler=_bool_env("ENABLE_SCHEDULER", False),
         sched_ingest_interval_sec=_int_env("SCHED_INGEST_INTERVAL_SEC", 600),
         sched_picks_interval_sec=_int_env("SCHED_PICKS_INTERVAL_SEC", 600),
@@ -2,12 +2,19 @@ from __future__ import annotations
 
 import math
 from collections.abc import Sequence
+from decimal import Decimal
 
 from app.domain.enums import Side
 from app.domain.types import Leg
 
 EPS = 1e-9
 
+# Quantizers for the Numeric column scales used when persisting floats.
+PLACES_4 = Decimal("0.0001")
+PLACES_5 = Decimal("0.00001")
+PLACES_6 = Decimal("0.000001")
+PLACES_8 = Decimal("0.00000001")
+
 
 def _ensure_finite(value: float, name: str) -> float:
     if not math.isfinite(value):
@@ -22,6 +29,12 @@ def _validate_probability(value: float, name: str) -> float:
     return value
 
 
+def to_decimal(value: float, places: Decimal) -> Decimal:
+    # Quantize the shortest repr, not the exact binary expansion, so half
+    # boundaries like 2.675 round the way the printed value reads.
+    return Decimal(str(value)).quantize(places)
+
+
 def american_to_decimal(american_odds: float) -> float:
     american_odds = _ensure_finite(float(american_odds), "american_odds")
     if abs(american_odds) < 100:
@@ -49,11 +62,32 @@ def american_to_implied_prob(american_odds: float) -> float:
     return abs(american_odds) / (abs(american_odds) + 100.0)
 
 
+def american_to_decimal_and_implied_prob(american_odds: float) -> tuple[float, float]:
+    # Same results as american_to_decimal and american_to_implied_prob, with
+    # one validation pass for callers that need both.
+    american_odds = _ensure_finite(float(american_odds), "american_odds")
+    if abs(american_odds) < 100:
+        raise ValueError("american_odds must be <= -100 or >= 100")
+    if american_odds > 0:
+        return 1.0 + (american_odds / 100.0), 100.0 / (american_odds + 100.0)
+    magnitude = abs(american_odds)
+    return 1.0 + (100.0 / magnitude), magnitude / (magnitude + 100.0)
+
+
 def remove_vig(probs: Sequence[float]) -> list[float]:
     if not probs:
         raise ValueError("probs must not be empty")
-    validated = [_validate_probability(float(p), "probability") for p in probs]
-    total = sum(validated)
+    # Called once per odds group with two or three values, so the range check
+    # is inlined; anything outside [0, 1] (including NaN/inf) goes through
+    # _validate_probability for the usual error.
+    validated: list[float] = []
+    total = 0.0
+    for p in probs:
+        p = float(p)
+        if not 0.0 <= p <= 1.0:
+            _validate_probability(p, "probability")
+        validated.append(p)
+        total += p
     if total <= EPS:
         raise ValueError("sum of probabilities must be greater than zero")
     return [p / total for p in validated]
@@ -124,6 +158,18 @@ def kelly_fraction(
     return min(max_cap, kelly_multiplier * full_kelly)
 
 
+def ev_and_kelly_fraction(
+    fair_prob: float,
+    best_decimal_odds: float,
+    kelly_multiplier: float = 0.25,
+    max_cap: float = 0.05,
+) -> tuple[float, float]:
+    # One call for the per-candidate pick loop; the formulas live only in
+    # ev_percent and kelly_fraction.
+    ev = ev_percent(fair_prob, best_decimal_odds)
+    return ev, kelly_fraction(fair_prob, best_decimal_odds, kelly_multiplier=kelly_multiplier, max_cap=max_cap)
+
+
 def _validate_legs(legs: Sequence[Leg]) -> None:
     if not legs:
         raise ValueError("legs must not be empty")
@@ -6,7 +6,7 @@ from sqlalchemy.orm import Session, sessionmaker
 from app.config import get_settings
 
 settings = get_settings()
-engine = create_engine(settings.database_url, future=True)
+engine = create_engine(settings.database_url, future=True, query_cache_size=1200)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, class_=Session)
 
 
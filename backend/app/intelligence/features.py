@@ -4,14 +4,13 @@ from dataclasses import dataclass
 from datetime import datetime, timezone
 import logging
 
-from app.core.math import remove_vig
 from app.domain.enums import Side
 from app.services.consensus import ConsensusResult
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PickFeatures:
     ev: float
     kelly_fraction: float
@@ -41,14 +40,12 @@ def _percentile(sorted_values: list[float], q: float) -> float:
     return sorted_values[lower_index] + ((sorted_values[upper_index] - sorted_values[lower_index]) * fraction)
 
 
-def _opposite_side(side: Side) -> Side:
-    if side == Side.HOME:
-        return Side.AWAY
-    if side == Side.AWAY:
-        return Side.HOME
-    if side == Side.OVER:
-        return Side.UNDER
-    return Side.OVER
+_OPPOSITE_SIDE: dict[Side, Side] = {
+    Side.HOME: Side.AWAY,
+    Side.AWAY: Side.HOME,
+    Side.OVER: Side.UNDER,
+    Side.UNDER: Side.OVER,
+}
 
 
 def build_dispersion_inputs(
@@ -56,7 +53,7 @@ def build_dispersion_inputs(
     side: Side,
     book_odds: dict[str, dict[Side, float]],
 ) -> tuple[dict[str, float], dict[str, float]]:
-    opposite = _opposite_side(side)
+    opposite = _OPPOSITE_SIDE[side]
     odds_by_book: dict[str, float] = {}
     other_side_odds_by_book: dict[str, float] = {}
 
@@ -77,17 +74,13 @@ def build_dispersion_inputs(
 
 
 def compute_price_dispersion(*, odds_by_book: dict[str, float], other_side_odds_by_book: dict[str, float]) -> float:
-    probabilities: list[float] = []
-
-    common_books = sorted(set(odds_by_book).intersection(other_side_odds_by_book))
-    for book in common_books:
-        side_decimal = odds_by_book[book]
-        opposite_decimal = other_side_odds_by_book[book]
-
-        side_implied = 1.0 / side_decimal
-        opposite_implied = 1.0 / opposite_decimal
-        fair_side_prob = remove_vig([side_implied, opposite_implied])[0]
-        probabilities.append(_clamp(fair_side_prob))
+    # Two-way devig in closed form: (1/a) / (1/a + 1/b) == b / (a + b). The
+    # probabilities are sorted below, so book iteration order doesn't matter.
+    probabilities = [
+        _clamp(other_side_odds_by_book[book] / (side_decimal + other_side_odds_by_book[book]))
+        for book, side_decimal in odds_by_book.items()
+        if book in other_side_odds_by_book
+    ]
 
     if len(probabilities) < 3:
         return 1.0
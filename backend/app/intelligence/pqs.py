@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections.abc import Sequence
 from dataclasses import dataclass
 
 from app.config import Settings
@@ -8,7 +9,7 @@ from app.intelligence.features import PickFeatures
 from app.models import ClvSportStat
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PQSResult:
     pqs: float
     decision: PickScoreDecision
@@ -60,7 +61,10 @@ def score_pick(
     settings: Settings,
     prior: ClvSportStat | None,
     sport_key: str | None = None,
+    thresholds: tuple[float, int] | None = None,
 ) -> PQSResult:
+    # thresholds lets a caller scoring a whole run pass the per-run
+    # adaptive_thresholds() result instead of recomputing it for every pick.
     if features.book_count < settings.min_books:
         return PQSResult(0.0, PickScoreDecision.DROP, "min_books", {})
     if features.sharp_book_count < settings.sharp_book_min:
@@ -91,18 +95,6 @@ def score_pick(
         prior_score = _clamp((float(prior.pct_positive_market_clv) - 0.5) * 2.0 + 0.5)
     time_score = _clamp(features.time_to_start_minutes / max(settings.time_decay_half_life_min, 1))
 
-    components = {
-        "ev_score": round(ev_score, 6),
-        "agreement_score": round(agreement_score, 6),
-        "dispersion_score": round(dispersion_score, 6),
-        "coverage_score": round(coverage_score, 6),
-        "sharp_presence_score": round(sharp_score, 6),
-        "clv_prior_score": round(prior_score, 6),
-        "time_score": round(time_score, 6),
-        "adaptive_min_pqs": 0.0,
-        "adaptive_max_picks": 0.0,
-    }
-
     pqs = (
         settings.pqs_weight_ev * ev_score
         + settings.pqs_weight_agreement * agreement_score
@@ -113,12 +105,38 @@ def score_pick(
         + settings.pqs_weight_time_to_start * time_score
     )
 
-    min_pqs, max_picks = adaptive_thresholds(settings, prior, sport_key=sport_key)
-    components["adaptive_min_pqs"] = min_pqs
-    components["adaptive_max_picks"] = float(max_picks)
-    components["adaptive_max_price_dispersion"] = round(adaptive_max_price, 6)
-    components["adaptive_min_minutes_to_start"] = float(min_minutes_to_start)
+    if thresholds is None:
+        thresholds = adaptive_thresholds(settings, prior, sport_key=sport_key)
+    min_pqs, max_picks = thresholds
+    components = {
+        "ev_score": round(ev_score, 6),
+        "agreement_score": round(agreement_score, 6),
+        "dispersion_score": round(dispersion_score, 6),
+        "coverage_score": round(coverage_score, 6),
+        "sharp_presence_score": round(sharp_score, 6),
+        "clv_prior_score": round(prior_score, 6),
+        "time_score": round(time_score, 6),
+        "adaptive_min_pqs": min_pqs,
+        "adaptive_max_picks": float(max_picks),
+        "adaptive_max_price_dispersion": round(adaptive_max_price, 6),
+        "adaptive_min_minutes_to_start": float(min_minutes_to_start),
+    }
 
     decision = PickScoreDecision.KEEP if pqs >= min_pqs else PickScoreDecision.DROP
     drop_reason = None if decision == PickScoreDecision.KEEP else "below_min_pqs"
     return PQSResult(round(_clamp(pqs), 6), decision, drop_reason, components)
+
+
+def score_picks(
+    *,
+    features: Sequence[PickFeatures],
+    settings: Settings,
+    prior: ClvSportStat | None,
+    sport_key: str | None = None,
+) -> list[PQSResult]:
+    """Score every candidate of one sport/market run, in input order."""
+    thresholds = adaptive_thresholds(settings, prior, sport_key=sport_key)
+    return [
+        score_pick(features=item, settings=settings, prior=prior, sport_key=sport_key, thresholds=thresholds)
+        for item in features
+    ]
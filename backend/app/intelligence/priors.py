@@ -1,13 +1,14 @@
 from __future__ import annotations
 
+import math
 from datetime import datetime, timezone
-from decimal import Decimal
-from statistics import mean, median, pstdev
+from statistics import median
 
-from sqlalchemy import and_, delete, desc, select
+from sqlalchemy import Float, and_, cast, delete, desc, func, insert, select
 from sqlalchemy.orm import Session
 
 from app.config import Settings
+from app.core.math import PLACES_4, PLACES_6, to_decimal
 from app.models import ClvSportStat, Game, Pick
 
 
@@ -15,30 +16,61 @@ def _bps(value: float) -> float:
     return value * 10000.0
 
 
+def _mean_pstdev_positive(values: list[float]) -> tuple[float, float, int]:
+    # statistics.mean/pstdev go through exact Fraction arithmetic; plain float
+    # loops are plenty for bps-scale CLV rounded to 4-6 places on write.
+    n = len(values)
+    avg = math.fsum(values) / n
+    positive = 0
+    squares = 0.0
+    for value in values:
+        if value > 0:
+            positive += 1
+        diff = value - avg
+        squares += diff * diff
+    # A constant window must report zero volatility (and so a zero sharpe)
+    # even when avg picked up rounding error.
+    if min(values) == max(values):
+        squares = 0.0
+    return avg, math.sqrt(squares / n), positive
+
+
 def recompute_clv_sport_stats(session: Session, settings: Settings) -> dict[str, int]:
     as_of = datetime.now(timezone.utc).replace(microsecond=0)
-    rows = (
-        session.execute(
-            select(Pick, Game)
-            .join(Game, Pick.game_id == Game.id)
-            .where(and_(Pick.clv_computed_at.is_not(None), Pick.market_clv.is_not(None)))
-            .order_by(desc(Pick.clv_computed_at), desc(Pick.id))
+    # Rank picks newest-first within each sport/market and let the database
+    # cut every group to the prior window, returning only the CLV columns.
+    ranked = (
+        select(
+            Game.sport_key,
+            Pick.market_key,
+            cast(Pick.market_clv, Float).label("market_clv"),
+            cast(Pick.book_clv, Float).label("book_clv"),
+            func.row_number()
+            .over(
+                partition_by=(Game.sport_key, Pick.market_key),
+                order_by=(desc(Pick.clv_computed_at), desc(Pick.id)),
+            )
+            .label("rank"),
         )
-        .all()
+        .join(Game, Pick.game_id == Game.id)
+        .where(and_(Pick.clv_computed_at.is_not(None), Pick.market_clv.is_not(None)))
+        .subquery()
+    )
+    rows = session.execute(
+        select(ranked.c.sport_key, ranked.c.market_key, ranked.c.market_clv, ranked.c.book_clv)
+        .where(ranked.c.rank <= settings.clv_prior_window)
     )
 
-    grouped: dict[tuple[str, str], list[tuple[Pick, Game]]] = {}
-    for pick, game in rows:
-        key = (game.sport_key, pick.market_key)
-        if len(grouped.get(key, [])) < settings.clv_prior_window:
-            grouped.setdefault(key, []).append((pick, game))
+    grouped: dict[tuple[str, str], list[tuple[float, float | None]]] = {}
+    for sport_key, market_key, market_clv, book_clv in rows:
+        grouped.setdefault((sport_key, market_key), []).append((market_clv, book_clv))
 
     session.execute(delete(ClvSportStat).where(ClvSportStat.window_size == settings.clv_prior_window))
 
-    inserted = 0
+    stat_rows: list[dict[str, object]] = []
     for (sport_key, market_key), picks in sorted(grouped.items()):
-        market_vals = [_bps(float(p.market_clv)) for p, _ in picks if p.market_clv is not None]
-        book_vals = [_bps(float(p.book_clv)) for p, _ in picks if p.book_clv is not None]
+        market_vals = [_bps(market_clv) for market_clv, _ in picks]
+        book_vals = [_bps(book_clv) for _, book_clv in picks if book_clv is not None]
         n = len(market_vals)
         weak = n < settings.clv_min_n_for_prior
         if n == 0:
@@ -47,33 +79,32 @@ def recompute_clv_sport_stats(session: Session, settings: Settings) -> dict[str,
             pct_positive = 0.5
             sharpe = 0.0
         else:
-            mean_market = mean(market_vals) if not weak else 0.0
+            avg, vol, positive = _mean_pstdev_positive(market_vals)
+            mean_market = avg if not weak else 0.0
             median_market = median(market_vals) if not weak else 0.0
-            pct_positive = (sum(1 for v in market_vals if v > 0) / n) if not weak else 0.5
-            vol = pstdev(market_vals) if n > 1 else 0.0
-            sharpe = (mean(market_vals) / vol) if vol > 0 else 0.0
-
-        session.add(
-            ClvSportStat(
-                sport_key=sport_key,
-                market_key=market_key,
-                side_type=None,
-                window_size=settings.clv_prior_window,
-                as_of=as_of,
-                n=n,
-                mean_market_clv_bps=Decimal(str(round(mean_market, 4))),
-                median_market_clv_bps=Decimal(str(round(median_market, 4))),
-                pct_positive_market_clv=Decimal(str(round(pct_positive, 6))),
-                mean_same_book_clv_bps=Decimal(str(round(mean(book_vals), 4))) if book_vals else None,
-                sharpe_like=Decimal(str(round(sharpe, 6))),
-                is_weak=1 if weak else 0,
-                last_updated_at=as_of,
-            )
-        )
-        inserted += 1
+            pct_positive = (positive / n) if not weak else 0.5
+            sharpe = (avg / vol) if vol > 0 else 0.0
+
+        stat_rows.append({
+            "sport_key": sport_key,
+            "market_key": market_key,
+            "side_type": None,
+            "window_size": settings.clv_prior_window,
+            "as_of": as_of,
+            "n": n,
+            "mean_market_clv_bps": to_decimal(mean_market, PLACES_4),
+            "median_market_clv_bps": to_decimal(median_market, PLACES_4),
+            "pct_positive_market_clv": to_decimal(pct_positive, PLACES_6),
+            "mean_same_book_clv_bps": to_decimal(math.fsum(book_vals) / len(book_vals), PLACES_4) if book_vals else None,
+            "sharpe_like": to_decimal(sharpe, PLACES_6),
+            "is_weak": 1 if weak else 0,
+            "last_updated_at": as_of,
+        })
 
+    if stat_rows:
+        session.execute(insert(ClvSportStat), stat_rows)
     session.commit()
-    return {"inserted": inserted, "as_of": as_of.isoformat()}
+    return {"inserted": len(stat_rows), "as_of": as_of.isoformat()}
 
 
 def get_latest_prior(session: Session, *, sport_key: str, market_key: str, window_size: int) -> ClvSportStat | None:
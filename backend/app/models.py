@@ -82,6 +82,7 @@ class Pick(Base):
             "captured_at_max",
             name="uq_pick_snapshot",
         ),
+        Index("ix_picks_created_at_id", "created_at", "id"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -135,6 +136,7 @@ class PickScore(Base):
         Index("ix_pick_scores_version_scored_at", "version", "scored_at"),
         Index("ix_pick_scores_decision", "decision"),
         Index("ix_pick_scores_pqs", "pqs"),
+        Index("ix_pick_scores_pick_version_scored_at", "pick_id", "version", "scored_at"),
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
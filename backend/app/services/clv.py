@@ -2,44 +2,47 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import date, datetime, time, timedelta, timezone
-from decimal import Decimal
 
-from sqlalchemy import and_, desc, func, select
+from sqlalchemy import Float, and_, bindparam, cast, desc, func, select, update
 from sqlalchemy.orm import Session
 
 from app.config import get_settings
 from app.core.math import book_clv, consensus_fair_prob, market_clv
 from app.models import Game, OddsSnapshot, Pick
 
+CLV_BATCH_SIZE = 500
+
 
 @dataclass
 class ClosingMarketView:
     consensus_probs: dict[str, float]
     best_decimal_by_side: dict[str, float]
     rows: list[OddsSnapshot]
+    by_book_side: dict[str, dict[str, OddsSnapshot]]
     captured_at_used: datetime
 
 
+_SOCCER_H2H_SIDES = ("AWAY", "DRAW", "HOME")
+_TWO_WAY_SIDES = ("AWAY", "HOME")
+_OVER_UNDER_SIDES = ("OVER", "UNDER")
+
+
 def _required_sides(sport_key: str, market_key: str) -> tuple[str, ...]:
     if market_key == "h2h" and sport_key.startswith("soccer_"):
-        return ("AWAY", "DRAW", "HOME")
+        return _SOCCER_H2H_SIDES
     if market_key == "h2h" or market_key == "spreads":
-        return ("AWAY", "HOME")
-    return ("OVER", "UNDER")
-
+        return _TWO_WAY_SIDES
+    return _OVER_UNDER_SIDES
 
-def _to_decimal(value: float, places: str) -> Decimal:
-    return Decimal(str(value)).quantize(Decimal(places))
-
-
-def get_closing_market_view(session: Session, pick: Pick) -> ClosingMarketView | None:
-    game = session.get(Game, pick.game_id)
-    if game is None:
-        return None
 
-    required_sides = _required_sides(game.sport_key, pick.market_key)
-    required_side_values = list(required_sides)
-    point_match = OddsSnapshot.point.is_(None) if pick.point is None else OddsSnapshot.point == pick.point
+def _build_closing_rows_stmt(point_is_null: bool):
+    # Every filter is a bindparam so each variant is built once at import and
+    # re-executed with per-pick values; only the point IS NULL check needs its
+    # own statement.
+    game_id = bindparam("game_id")
+    market_key = bindparam("market_key")
+    sides = bindparam("sides", expanding=True)
+    point_match = OddsSnapshot.point.is_(None) if point_is_null else OddsSnapshot.point == bindparam("point")
 
     per_timestamp = (
         select(
@@ -48,11 +51,11 @@ def get_closing_market_view(session: Session, pick: Pick) -> ClosingMarketView |
             func.count(func.distinct(OddsSnapshot.side)).label("side_count"),
         )
         .where(
-            OddsSnapshot.game_id == pick.game_id,
-            OddsSnapshot.market_key == pick.market_key,
+            OddsSnapshot.game_id == game_id,
+            OddsSnapshot.market_key == market_key,
             point_match,
-            OddsSnapshot.captured_at < game.commence_time,
-            OddsSnapshot.side.in_(required_side_values),
+            OddsSnapshot.captured_at < bindparam("commence_time"),
+            OddsSnapshot.side.in_(sides),
         )
         .group_by(OddsSnapshot.bookmaker, OddsSnapshot.captured_at)
         .subquery()
@@ -63,50 +66,78 @@ def get_closing_market_view(session: Session, pick: Pick) -> ClosingMarketView |
             per_timestamp.c.bookmaker,
             func.max(per_timestamp.c.captured_at).label("captured_at"),
         )
-        .where(per_timestamp.c.side_count == len(required_sides))
+        .where(per_timestamp.c.side_count == bindparam("side_count"))
         .group_by(per_timestamp.c.bookmaker)
         .subquery()
     )
 
-    rows = (
-        session.execute(
-            select(OddsSnapshot)
-            .join(
-                latest_complete,
-                and_(
-                    OddsSnapshot.bookmaker == latest_complete.c.bookmaker,
-                    OddsSnapshot.captured_at == latest_complete.c.captured_at,
-                ),
-            )
-            .where(
-                OddsSnapshot.game_id == pick.game_id,
-                OddsSnapshot.market_key == pick.market_key,
-                point_match,
-                OddsSnapshot.side.in_(required_side_values),
-            )
-            .order_by(
-                OddsSnapshot.bookmaker.asc(),
-                OddsSnapshot.captured_at.desc(),
-                OddsSnapshot.side.asc(),
-                OddsSnapshot.id.desc(),
-            )
+    return (
+        select(OddsSnapshot)
+        .join(
+            latest_complete,
+            and_(
+                OddsSnapshot.bookmaker == latest_complete.c.bookmaker,
+                OddsSnapshot.captured_at == latest_complete.c.captured_at,
+            ),
+        )
+        .where(
+            OddsSnapshot.game_id == game_id,
+            OddsSnapshot.market_key == market_key,
+            point_match,
+            OddsSnapshot.side.in_(sides),
+        )
+        .order_by(
+            OddsSnapshot.bookmaker.asc(),
+            OddsSnapshot.captured_at.desc(),
+            OddsSnapshot.side.asc(),
+            OddsSnapshot.id.asc(),
         )
-        .scalars()
-        .all()
     )
 
+
+_CLOSING_ROWS_STMT = _build_closing_rows_stmt(point_is_null=False)
+_CLOSING_ROWS_NULL_POINT_STMT = _build_closing_rows_stmt(point_is_null=True)
+
+
+def get_closing_market_view(session: Session, pick: Pick) -> ClosingMarketView | None:
+    game = session.get(Game, pick.game_id)
+    if game is None:
+        return None
+
+    required_sides = _required_sides(game.sport_key, pick.market_key)
+    params = {
+        "game_id": pick.game_id,
+        "market_key": pick.market_key,
+        "commence_time": game.commence_time,
+        "sides": list(required_sides),
+        "side_count": len(required_sides),
+    }
+    if pick.point is None:
+        stmt = _CLOSING_ROWS_NULL_POINT_STMT
+    else:
+        stmt = _CLOSING_ROWS_STMT
+        params["point"] = pick.point
+
+    rows = session.execute(stmt, params).scalars().all()
+
     if not rows:
         return None
 
+    # Rows are ordered newest-first within each bookmaker (lowest id first on
+    # a captured_at tie), so the first row seen for a (bookmaker, side) is the
+    # one to keep, and once a bookmaker has every required side its remaining
+    # rows can be skipped.
+    side_count = len(required_sides)
     by_book: dict[str, dict[str, OddsSnapshot]] = {}
+    complete_books: dict[str, dict[str, OddsSnapshot]] = {}
     for row in rows:
-        by_book.setdefault(row.bookmaker, {})[row.side] = row
-
-    complete_books = {
-        bookmaker: side_rows
-        for bookmaker, side_rows in by_book.items()
-        if all(side in side_rows for side in required_sides)
-    }
+        bookmaker = row.bookmaker
+        if bookmaker in complete_books:
+            continue
+        side_rows = by_book.setdefault(bookmaker, {})
+        side_rows.setdefault(row.side, row)
+        if len(side_rows) == side_count:
+            complete_books[bookmaker] = side_rows
     if not complete_books:
         return None
 
@@ -128,18 +159,13 @@ def get_closing_market_view(session: Session, pick: Pick) -> ClosingMarketView |
     consensus_probs = consensus_fair_prob(books_probs=books_probs, weights=weights)
 
     best_decimal_by_side: dict[str, float] = {}
-    for side in required_sides:
-        best = max(
-            (
-                (float(side_rows[side].decimal), bookmaker)
-                for bookmaker, side_rows in complete_books.items()
-                if side_rows[side].decimal is not None
-            ),
-            default=None,
-            key=lambda item: (item[0], item[1]),
-        )
-        if best is not None:
-            best_decimal_by_side[side] = best[0]
+    for side_rows in complete_books.values():
+        for side in required_sides:
+            decimal = side_rows[side].decimal
+            if decimal is not None:
+                value = float(decimal)
+                if value > best_decimal_by_side.get(side, 0.0):
+                    best_decimal_by_side[side] = value
 
     captured_at_used = max(row.captured_at for row in rows)
 
@@ -147,27 +173,43 @@ def get_closing_market_view(session: Session, pick: Pick) -> ClosingMarketView |
         consensus_probs=consensus_probs,
         best_decimal_by_side=best_decimal_by_side,
         rows=rows,
+        by_book_side=by_book,
         captured_at_used=captured_at_used,
     )
 
 
-def compute_pick_clv(session: Session, pick: Pick) -> bool:
+ClosingViewCache = dict[tuple[int, str, object], ClosingMarketView | None]
+
+
+def _pick_clv_values(
+    session: Session,
+    pick: Pick,
+    view_cache: ClosingViewCache | None = None,
+) -> dict[str, object] | None:
     side = pick.side
-    closing_view = get_closing_market_view(session, pick)
+    if view_cache is None:
+        closing_view = get_closing_market_view(session, pick)
+    else:
+        # The closing view depends only on the market, not the side or book,
+        # so picks on the same market share one lookup.
+        market = (pick.game_id, pick.market_key, pick.point)
+        if market in view_cache:
+            closing_view = view_cache[market]
+        else:
+            closing_view = view_cache[market] = get_closing_market_view(session, pick)
     if closing_view is None:
-        return False
+        return None
 
     closing_consensus_prob = closing_view.consensus_probs.get(side)
     if closing_consensus_prob is None:
-        return False
+        return None
 
     pick_time_implied_prob = 1.0 / float(pick.best_decimal)
 
+    closing_book_row = closing_view.by_book_side.get(pick.best_book, {}).get(side)
     closing_book_decimal: float | None = None
-    for row in closing_view.rows:
-        if row.bookmaker == pick.best_book and row.side == side and row.decimal is not None:
-            closing_book_decimal = float(row.decimal)
-            break
+    if closing_book_row is not None and closing_book_row.decimal is not None:
+        closing_book_decimal = float(closing_book_row.decimal)
 
     closing_book_implied_prob: float | None = None
     computed_book_clv: float | None = None
@@ -175,20 +217,26 @@ def compute_pick_clv(session: Session, pick: Pick) -> bool:
         closing_book_implied_prob = 1.0 / closing_book_decimal
         computed_book_clv = book_clv(closing_book_implied_prob, pick_time_implied_prob)
 
-    pick.closing_consensus_prob = _to_decimal(closing_consensus_prob, "0.00000001")
-    pick.market_clv = _to_decimal(
-        market_clv(closing_consensus_prob, float(pick.consensus_prob)), "0.00000001"
-    )
-    pick.closing_book_decimal = (
-        _to_decimal(closing_book_decimal, "0.00001") if closing_book_decimal is not None else None
-    )
-    pick.closing_book_implied_prob = (
-        _to_decimal(closing_book_implied_prob, "0.00000001")
-        if closing_book_implied_prob is not None
-        else None
-    )
-    pick.book_clv = _to_decimal(computed_book_clv, "0.00000001") if computed_book_clv is not None else None
-    pick.clv_computed_at = datetime.now(timezone.utc)
+    # Rounded floats bind straight into the Numeric columns; the database
+    # applies the column scale, so no per-value Decimal parse is needed.
+    return {
+        "closing_consensus_prob": round(closing_consensus_prob, 8),
+        "market_clv": round(market_clv(closing_consensus_prob, float(pick.consensus_prob)), 8),
+        "closing_book_decimal": round(closing_book_decimal, 5) if closing_book_decimal is not None else None,
+        "closing_book_implied_prob": (
+            round(closing_book_implied_prob, 8) if closing_book_implied_prob is not None else None
+        ),
+        "book_clv": round(computed_book_clv, 8) if computed_book_clv is not None else None,
+        "clv_computed_at": datetime.now(timezone.utc),
+    }
+
+
+def compute_pick_clv(session: Session, pick: Pick) -> bool:
+    values = _pick_clv_values(session, pick)
+    if values is None:
+        return False
+    for column, value in values.items():
+        setattr(pick, column, value)
     return True
 
 
@@ -196,102 +244,97 @@ def compute_clv_for_date(session: Session, date_utc: date, force: bool = False)
     day_start = datetime.combine(date_utc, time.min, tzinfo=timezone.utc)
     day_end = day_start + timedelta(days=1)
 
-    rows = session.execute(
+    picks = session.execute(
         select(Pick)
         .join(Game, Pick.game_id == Game.id)
         .where(and_(Game.commence_time >= day_start, Game.commence_time < day_end))
         .order_by(desc(Pick.created_at), desc(Pick.id))
-    ).scalars().all()
+        .execution_options(yield_per=CLV_BATCH_SIZE)
+    ).scalars()
 
     summary = {
-        "processed": len(rows),
+        "processed": 0,
         "updated": 0,
         "skipped_no_close": 0,
         "skipped_already_computed": 0,
     }
 
-    for pick in rows:
-        if pick.clv_computed_at is not None and not force:
-            summary["skipped_already_computed"] += 1
-            continue
-
-        updated = compute_pick_clv(session, pick)
-        if updated:
-            summary["updated"] += 1
-        else:
-            summary["skipped_no_close"] += 1
+    # Stream picks in batches and write each batch back as one bulk UPDATE by
+    # primary key. The picks themselves are never dirtied, so once expired the
+    # weak-referencing identity map releases them and memory stays bounded by
+    # the batch size rather than the day's pick count.
+    for batch in picks.partitions():
+        updates: list[dict[str, object]] = []
+        view_cache: ClosingViewCache = {}
+        for pick in batch:
+            summary["processed"] += 1
+            if pick.clv_computed_at is not None and not force:
+                summary["skipped_already_computed"] += 1
+                continue
+
+            values = _pick_clv_values(session, pick, view_cache)
+            if values is not None:
+                updates.append({"id": pick.id, **values})
+                summary["updated"] += 1
+            else:
+                summary["skipped_no_close"] += 1
+
+        if updates:
+            session.execute(update(Pick), updates)
+        for pick in batch:
+            session.expire(pick)
 
     session.commit()
     return summary
 
 
 def list_latest_clv(session: Session, limit: int = 50) -> list[dict[str, object]]:
-    rows = (
-        session.execute(
-            select(Pick, Game)
-            .join(Game, Pick.game_id == Game.id)
-            .where(Pick.clv_computed_at.is_not(None))
-            .order_by(desc(Pick.clv_computed_at), desc(Pick.id))
-            .limit(limit)
+    # Select just the response columns, with numerics cast to floats in SQL,
+    # so rows map straight to dicts without hydrating Pick/Game objects.
+    rows = session.execute(
+        select(
+            Pick.id,
+            Game.event_id,
+            Game.sport_key,
+            Pick.market_key,
+            Pick.side,
+            Pick.best_book,
+            cast(Pick.consensus_prob, Float).label("consensus_prob"),
+            cast(Pick.closing_consensus_prob, Float).label("closing_consensus_prob"),
+            cast(Pick.market_clv, Float).label("market_clv"),
+            cast(Pick.closing_book_decimal, Float).label("closing_book_decimal"),
+            cast(Pick.closing_book_implied_prob, Float).label("closing_book_implied_prob"),
+            cast(Pick.book_clv, Float).label("book_clv"),
+            Pick.clv_computed_at,
         )
-        .all()
+        .join(Game, Pick.game_id == Game.id)
+        .where(Pick.clv_computed_at.is_not(None))
+        .order_by(desc(Pick.clv_computed_at), desc(Pick.id))
+        .limit(limit)
     )
-
-    output: list[dict[str, object]] = []
-    for pick, game in rows:
-        output.append(
-            {
-                "id": pick.id,
-                "event_id": game.event_id,
-                "sport_key": game.sport_key,
-                "market_key": pick.market_key,
-                "side": pick.side,
-                "best_book": pick.best_book,
-                "consensus_prob": float(pick.consensus_prob),
-                "closing_consensus_prob": float(pick.closing_consensus_prob),
-                "market_clv": float(pick.market_clv),
-                "closing_book_decimal": float(pick.closing_book_decimal)
-                if pick.closing_book_decimal is not None
-                else None,
-                "closing_book_implied_prob": float(pick.closing_book_implied_prob)
-                if pick.closing_book_implied_prob is not None
-                else None,
-                "book_clv": float(pick.book_clv) if pick.book_clv is not None else None,
-                "clv_computed_at": pick.clv_computed_at,
-            }
-        )
-
-    return output
-
+    return [dict(row._mapping) for row in rows]
 
 
 def list_clv_sport_stats(session: Session, limit: int = 100) -> list[dict[str, object]]:
     from app.models import ClvSportStat
 
-    rows = (
-        session.execute(
-            select(ClvSportStat)
-            .order_by(desc(ClvSportStat.as_of), desc(ClvSportStat.id))
-            .limit(limit)
+    rows = session.execute(
+        select(
+            ClvSportStat.sport_key,
+            ClvSportStat.market_key,
+            ClvSportStat.side_type,
+            ClvSportStat.window_size,
+            ClvSportStat.as_of,
+            ClvSportStat.n,
+            cast(ClvSportStat.mean_market_clv_bps, Float).label("mean_market_clv_bps"),
+            cast(ClvSportStat.median_market_clv_bps, Float).label("median_market_clv_bps"),
+            cast(ClvSportStat.pct_positive_market_clv, Float).label("pct_positive_market_clv"),
+            cast(ClvSportStat.mean_same_book_clv_bps, Float).label("mean_same_book_clv_bps"),
+            cast(ClvSportStat.sharpe_like, Float).label("sharpe_like"),
+            ClvSportStat.is_weak,
+            ClvSportStat.last_updated_at,
         )
-        .scalars()
-        .all()
+        .order_by(desc(ClvSportStat.as_of), desc(ClvSportStat.id))
+        .limit(limit)
     )
-    return [
-        {
-            "sport_key": row.sport_key,
-            "market_key": row.market_key,
-            "side_type": row.side_type,
-            "window_size": row.window_size,
-            "as_of": row.as_of,
-            "n": row.n,
-            "mean_market_clv_bps": float(row.mean_market_clv_bps),
-            "median_market_clv_bps": float(row.median_market_clv_bps),
-            "pct_positive_market_clv": float(row.pct_positive_market_clv),
-            "mean_same_book_clv_bps": float(row.mean_same_book_clv_bps) if row.mean_same_book_clv_bps is not None else None,
-            "sharpe_like": float(row.sharpe_like) if row.sharpe_like is not None else None,
-            "is_weak": bool(row.is_weak),
-            "last_updated_at": row.last_updated_at,
-        }
-        for row in rows
-    ]
+    return [dict(row._mapping) for row in rows]
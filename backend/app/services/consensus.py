@@ -4,8 +4,7 @@ from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
 
-from pydantic import BaseModel
-from sqlalchemy import Numeric, and_, bindparam, func, select
+from sqlalchemy import Float, Numeric, and_, bindparam, cast, func, select
 from sqlalchemy.orm import Session
 
 from app.config import get_settings
@@ -27,8 +26,8 @@ class OddsSnapshotRow:
     point: Decimal | None
     captured_at: datetime
     american: int | None
-    decimal: Decimal | None
-    fair_prob: Decimal
+    decimal: float | None
+    fair_prob: float
 
 
 @dataclass
@@ -48,7 +47,8 @@ class MarketView:
     book_list: list[str]
 
 
-class ConsensusResult(BaseModel):
+@dataclass(frozen=True, slots=True)
+class ConsensusResult:
     event_id: str
     sport_key: str
     commence_time: datetime
@@ -57,7 +57,7 @@ class ConsensusResult(BaseModel):
     market_key: str
     point: float | None
     consensus_probs: dict[Side, float] | None
-    consensus_reason: str | None = None
+    consensus_reason: str | None
     included_books: int
     sharp_books_included: int
     best_decimal: dict[Side, float]
@@ -66,18 +66,33 @@ class ConsensusResult(BaseModel):
     captured_at_max: datetime
 
 
-def _required_sides(market_key: str) -> set[Side]:
-    market = MarketKey(market_key)
-    if market in {MarketKey.H2H, MarketKey.SPREADS}:
-        return {Side.HOME, Side.AWAY}
-    return {Side.OVER, Side.UNDER}
+_SIDE_BY_VALUE: dict[str, Side] = {side.value: side for side in Side}
+_TWO_WAY_SIDES = frozenset({Side.HOME, Side.AWAY})
+_OVER_UNDER_SIDES = frozenset({Side.OVER, Side.UNDER})
+_REQUIRED_SIDES_BY_MARKET: dict[MarketKey, frozenset[Side]] = {
+    MarketKey.H2H: _TWO_WAY_SIDES,
+    MarketKey.SPREADS: _TWO_WAY_SIDES,
+    MarketKey.TOTALS: _OVER_UNDER_SIDES,
+}
+
+
+def _required_sides(market_key: str) -> frozenset[Side]:
+    required = _REQUIRED_SIDES_BY_MARKET.get(market_key)
+    if required is None:
+        # Let MarketKey raise its usual ValueError for unknown markets.
+        required = _REQUIRED_SIDES_BY_MARKET[MarketKey(market_key)]
+    return required
 
 
 POINT_SENTINEL = -999999
+_NULL_POINT_ORDER = float("-inf")
 
 
-def _build_latest_group_rows_stmt(sport_key: str, market_key: str):
-    market = MarketKey(market_key)
+def _build_latest_group_rows_stmt():
+    # sport_key and market_key are bound per execution so the statement is
+    # built once and its compiled form stays in SQLAlchemy's cache.
+    sport_key = bindparam("sport_key")
+    market_key = bindparam("market_key")
 
     # Reuse one shared bindparam object for coalesce(point, sentinel) across
     # SELECT/GROUP BY/JOIN so Postgres sees the exact same expression and
@@ -93,7 +108,7 @@ def _build_latest_group_rows_stmt(sport_key: str, market_key: str):
             func.max(OddsSnapshot.captured_at).label("captured_at"),
         )
         .join(Game, Game.id == OddsSnapshot.game_id)
-        .where(Game.sport_key == sport_key, OddsSnapshot.market_key == market.value)
+        .where(Game.sport_key == sport_key, OddsSnapshot.market_key == market_key)
         .group_by(
             OddsSnapshot.game_id,
             OddsSnapshot.market_key,
@@ -102,8 +117,25 @@ def _build_latest_group_rows_stmt(sport_key: str, market_key: str):
         .subquery()
     )
 
+    # Prices and fair probabilities only feed float math downstream, so they
+    # are cast in SQL and come back as floats rather than Decimals.
     return (
-        select(Game, OddsSnapshot)
+        select(
+            Game.event_id,
+            Game.sport_key,
+            Game.commence_time,
+            Game.home_team,
+            Game.away_team,
+            OddsSnapshot.market_key,
+            OddsSnapshot.bookmaker,
+            OddsSnapshot.side,
+            OddsSnapshot.point,
+            OddsSnapshot.captured_at,
+            OddsSnapshot.american,
+            cast(OddsSnapshot.decimal, Float).label("decimal"),
+            cast(OddsSnapshot.fair_prob, Float).label("fair_prob"),
+        )
+        .select_from(Game)
         .join(OddsSnapshot, OddsSnapshot.game_id == Game.id)
         .join(
             latest_market_snapshot_subq,
@@ -114,7 +146,7 @@ def _build_latest_group_rows_stmt(sport_key: str, market_key: str):
                 OddsSnapshot.captured_at == latest_market_snapshot_subq.c.captured_at,
             ),
         )
-        .where(Game.sport_key == sport_key, OddsSnapshot.market_key == market.value)
+        .where(Game.sport_key == sport_key, OddsSnapshot.market_key == market_key)
         .order_by(
             Game.event_id.asc(),
             OddsSnapshot.market_key.asc(),
@@ -127,27 +159,47 @@ def _build_latest_group_rows_stmt(sport_key: str, market_key: str):
     )
 
 
+_LATEST_GROUP_ROWS_STMT = _build_latest_group_rows_stmt()
+
+
 def get_latest_group_rows(session: Session, sport_key: str, market_key: str) -> list[OddsSnapshotRow]:
-    stmt = _build_latest_group_rows_stmt(sport_key=sport_key, market_key=market_key)
-    rows = session.execute(stmt).all()
+    market = MarketKey(market_key)
+    rows = session.execute(
+        _LATEST_GROUP_ROWS_STMT,
+        {"sport_key": sport_key, "market_key": market.value},
+    ).all()
 
     return [
         OddsSnapshotRow(
-            event_id=game.event_id,
-            sport_key=game.sport_key,
-            commence_time=game.commence_time,
-            home_team=game.home_team,
-            away_team=game.away_team,
-            market_key=snap.market_key,
-            bookmaker=snap.bookmaker,
-            side=Side(snap.side),
-            point=snap.point,
-            captured_at=snap.captured_at,
-            american=snap.american,
-            decimal=snap.decimal,
-            fair_prob=snap.fair_prob,
+            event_id=event_id,
+            sport_key=row_sport_key,
+            commence_time=commence_time,
+            home_team=home_team,
+            away_team=away_team,
+            market_key=row_market_key,
+            bookmaker=bookmaker,
+            side=_SIDE_BY_VALUE[side],
+            point=point,
+            captured_at=captured_at,
+            american=american,
+            decimal=decimal,
+            fair_prob=fair_prob,
         )
-        for game, snap in rows
+        for (
+            event_id,
+            row_sport_key,
+            commence_time,
+            home_team,
+            away_team,
+            row_market_key,
+            bookmaker,
+            side,
+            point,
+            captured_at,
+            american,
+            decimal,
+            fair_prob,
+        ) in rows
     ]
 
 
@@ -155,14 +207,21 @@ def build_market_views(rows: list[OddsSnapshotRow]) -> dict[tuple[str, str, floa
     settings = get_settings()
     sharp_books_set = {book.lower() for book in settings.sharp_books}
 
+    # Sort keys are built once per group with a -inf point for null-point
+    # markets, so they order first under plain tuple comparison.
     grouped: dict[tuple[str, str, float | None], list[OddsSnapshotRow]] = {}
+    sort_keys: dict[tuple[str, str, float | None], tuple[str, str, float]] = {}
     for row in rows:
         point = float(row.point) if row.point is not None else None
         key = (row.event_id, row.market_key, point)
-        grouped.setdefault(key, []).append(row)
+        group = grouped.get(key)
+        if group is None:
+            group = grouped[key] = []
+            sort_keys[key] = (row.event_id, row.market_key, _NULL_POINT_ORDER if point is None else point)
+        group.append(row)
 
     output: dict[tuple[str, str, float | None], MarketView] = {}
-    for key in sorted(grouped.keys(), key=lambda x: (x[0], x[1], x[2] is not None, x[2] if x[2] is not None else -1)):
+    for key in sorted(grouped, key=sort_keys.__getitem__):
         view_rows = grouped[key]
         required = _required_sides(view_rows[0].market_key)
 
@@ -177,12 +236,12 @@ def build_market_views(rows: list[OddsSnapshotRow]) -> dict[tuple[str, str, floa
         }
 
         bookmaker_fair_probs = {
-            book: {side: float(sides[side].fair_prob) for side in sorted(required, key=lambda s: s.value)}
+            book: {side: sides[side].fair_prob for side in sorted(required, key=lambda s: s.value)}
             for book, sides in sorted(complete_books.items())
         }
         book_odds = {
             book: {
-                side: float(sides[side].decimal)
+                side: sides[side].decimal
                 for side in sorted(required, key=lambda s: s.value)
                 if sides[side].decimal is not None
             }
@@ -240,20 +299,28 @@ def compute_consensus_for_view(view: MarketView) -> ConsensusResult:
             consensus_probs = {side: prob / total for side, prob in consensus_probs.items()}
         assert abs(sum(consensus_probs.values()) - 1.0) <= settings.consensus_eps
 
+    # One pass over the rows for both the capture window and the best price.
+    rows = view.rows
+    captured_at_min = captured_at_max = rows[0].captured_at
     best_decimal: dict[Side, float] = {}
     best_book: dict[Side, str] = {}
     included_book_set = set(included_books)
-    for row in view.rows:
-        if row.bookmaker not in included_book_set or row.decimal is None:
+    for row in rows:
+        captured_at = row.captured_at
+        if captured_at < captured_at_min:
+            captured_at_min = captured_at
+        elif captured_at > captured_at_max:
+            captured_at_max = captured_at
+
+        bookmaker = row.bookmaker
+        decimal = row.decimal
+        if bookmaker not in included_book_set or decimal is None:
             continue
-        dec = float(row.decimal)
-        existing = best_decimal.get(row.side)
-        if existing is None or dec > existing:
-            best_decimal[row.side] = dec
-            best_book[row.side] = row.bookmaker
-
-    captured_at_min = min(row.captured_at for row in view.rows)
-    captured_at_max = max(row.captured_at for row in view.rows)
+        side = row.side
+        existing = best_decimal.get(side)
+        if existing is None or decimal > existing:
+            best_decimal[side] = decimal
+            best_book[side] = bookmaker
 
     return ConsensusResult(
         event_id=view.event_id,
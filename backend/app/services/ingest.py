@@ -1,11 +1,9 @@
 from __future__ import annotations
 
 import hashlib
-import json
 import logging
-from collections import defaultdict
 from datetime import datetime, timezone
-from decimal import Decimal
+from operator import itemgetter
 
 from typing import TYPE_CHECKING
 
@@ -13,33 +11,86 @@ if TYPE_CHECKING:
     from sqlalchemy.orm import Session
 
 from app.config import get_settings
-from app.core.math import american_to_decimal, american_to_implied_prob, remove_vig
+from app.core.math import american_to_decimal_and_implied_prob, remove_vig
 from app.domain.enums import Side
 from app.services.quota import record_quota
 
 logger = logging.getLogger(__name__)
 
+_by_side = itemgetter(0)
+_by_side_name = itemgetter("side")
+_by_key = itemgetter("key")
+_NULL_POINT_ORDER = float("-inf")
 
-def normalize_side(event_home: str, event_away: str, market_key: str, outcome_name: str) -> Side:
-    market = market_key.lower()
-    if market in {"h2h", "spreads"}:
-        if outcome_name.strip().lower() == event_home.strip().lower():
+
+_TOTALS_SIDES = {"over": Side.OVER, "under": Side.UNDER}
+_OPPOSITE_SIDE_VALUES = {
+    Side.HOME.value: Side.AWAY.value,
+    Side.AWAY.value: Side.HOME.value,
+    Side.OVER.value: Side.UNDER.value,
+    Side.UNDER.value: Side.OVER.value,
+}
+
+
+# Team names and market are passed in already stripped/lowercased so ingest
+# can prepare them once per event instead of once per outcome.
+def _normalize_outcome_side(home_key: str, away_key: str, market: str, outcome_name: str) -> Side:
+    normalized = outcome_name.strip().lower()
+    if market == "h2h" or market == "spreads":
+        if normalized == home_key:
             return Side.HOME
-        if outcome_name.strip().lower() == event_away.strip().lower():
+        if normalized == away_key:
             return Side.AWAY
         raise ValueError(
-            f"Could not map team outcome '{outcome_name}' to home='{event_home}' or away='{event_away}'"
+            f"Could not map team outcome '{outcome_name}' to home='{home_key}' or away='{away_key}'"
         )
 
     if market == "totals":
-        normalized = outcome_name.strip().lower()
-        if normalized == "over":
-            return Side.OVER
-        if normalized == "under":
-            return Side.UNDER
-        raise ValueError(f"Could not map totals outcome '{outcome_name}' to OVER/UNDER")
+        side = _TOTALS_SIDES.get(normalized)
+        if side is None:
+            raise ValueError(f"Could not map totals outcome '{outcome_name}' to OVER/UNDER")
+        return side
+
+    raise ValueError(f"Unsupported market_key '{market}'")
+
+
+def normalize_side(event_home: str, event_away: str, market_key: str, outcome_name: str) -> Side:
+    return _normalize_outcome_side(
+        event_home.strip().lower(),
+        event_away.strip().lower(),
+        market_key.lower(),
+        outcome_name,
+    )
+
 
-    raise ValueError(f"Unsupported market_key '{market_key}'")
+def _canonical_sides(side_prices: list[dict]) -> list[tuple]:
+    return sorted(
+        [
+            (side_price["side"], side_price.get("american"), side_price.get("decimal"))
+            for side_price in side_prices
+        ],
+        key=_by_side,
+    )
+
+
+def _hash_group(event_id: str, market_key: str, bookmaker: str, point: float | None, sides: list[tuple]) -> str:
+    # The hash only detects changes between captures, so it is taken over the
+    # repr of a canonical tuple rather than a sorted-keys JSON document. This
+    # is not the digest of the earlier JSON payload: last_hash values stored
+    # before the switch never match, so the first ingest after deploy treats
+    # every existing group as changed and writes one fresh snapshot for it.
+    payload = repr((event_id, market_key, bookmaker, point, tuple(sides)))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def compute_group_hash(
+    event_id: str,
+    market_key: str,
+    bookmaker: str,
+    point: float | None,
+    side_prices: list[dict],
+) -> str:
+    return _hash_group(event_id, market_key, bookmaker, point, _canonical_sides(side_prices))
 
 
 def build_normalized_group_representation(
@@ -49,26 +100,15 @@ def build_normalized_group_representation(
     point: float | None,
     side_prices: list[dict],
 ) -> tuple[dict, str]:
+    sides = _canonical_sides(side_prices)
     normalized = {
         "event_id": event_id,
         "market_key": market_key,
         "bookmaker": bookmaker,
         "point": point,
-        "sides": sorted(
-            [
-                {
-                    "side": side_price["side"],
-                    "american": side_price.get("american"),
-                    "decimal": side_price.get("decimal"),
-                }
-                for side_price in side_prices
-            ],
-            key=lambda x: x["side"],
-        ),
+        "sides": [{"side": side, "american": american, "decimal": decimal} for side, american, decimal in sides],
     }
-    payload = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
-    group_hash = hashlib.sha256(payload.encode("utf-8")).hexdigest()
-    return normalized, group_hash
+    return normalized, _hash_group(event_id, market_key, bookmaker, point, sides)
 
 
 def compute_fair_probs_for_group(implied_probs: list[float], epsilon: float = 1e-6) -> list[float]:
@@ -79,17 +119,16 @@ def compute_fair_probs_for_group(implied_probs: list[float], epsilon: float = 1e
 
 
 def parse_commence_time_to_utc(commence_time: str) -> datetime:
-    parsed = datetime.fromisoformat(commence_time.replace("Z", "+00:00"))
+    # fromisoformat accepts a trailing "Z" natively on 3.11+ and returns the
+    # timezone.utc singleton for it, which is already what callers want.
+    parsed = datetime.fromisoformat(commence_time)
+    if parsed.tzinfo is timezone.utc:
+        return parsed
     if parsed.tzinfo is None:
         return parsed.replace(tzinfo=timezone.utc)
     return parsed.astimezone(timezone.utc)
 
 
-def sort_group_key(event_id: str, group_key: tuple[str, str, float | None]) -> tuple[str, str, str, float]:
-    market_key, bookmaker, point = group_key
-    return (event_id, market_key, bookmaker, float("-inf") if point is None else point)
-
-
 def canonical_group_point(market_key: str, point: float | None) -> float | None:
     if point is None:
         return None
@@ -99,7 +138,7 @@ def canonical_group_point(market_key: str, point: float | None) -> float | None:
 
 
 def ingest_odds_for_sport(session: "Session", sport_key: str) -> dict:
-    from sqlalchemy import select
+    from sqlalchemy import insert, select, update
 
     from app.integrations.odds_api import fetch_odds
     from app.models import Game, OddsGroup, OddsSnapshot
@@ -124,53 +163,136 @@ def ingest_odds_for_sport(session: "Session", sport_key: str) -> dict:
         "errors_count": 0,
     }
 
-    bookmaker_filter = set(settings.bookmaker_whitelist)
+    bookmaker_filter = frozenset(settings.bookmaker_whitelist)
+    market_filter = frozenset(settings.odds_markets)
+    delta_hash_strict = settings.delta_hash_strict
     captured_at = datetime.now(timezone.utc)
 
-    for event in events:
+    # Load every game this payload touches in one query, then upsert them in a
+    # single pass with one flush so new games get their ids together.
+    event_ids = {event.get("id") for event in events} - {None}
+    persisted_games = {
+        game.event_id: game
+        for game in session.execute(select(Game).where(Game.event_id.in_(event_ids))).scalars()
+    }
+    existing_game_ids = [game.id for game in persisted_games.values()]
+    games_by_event_id = dict(persisted_games)
+
+    def upsert_game(event: dict) -> Game:
+        game = games_by_event_id.get(event["id"])
+        if game is None:
+            game = Game(
+                sport_key=event["sport_key"],
+                event_id=event["id"],
+                commence_time=parse_commence_time_to_utc(event["commence_time"]),
+                home_team=event["home_team"],
+                away_team=event["away_team"],
+            )
+            session.add(game)
+            games_by_event_id[event["id"]] = game
+        else:
+            game.sport_key = event["sport_key"]
+            game.commence_time = parse_commence_time_to_utc(event["commence_time"])
+            game.home_team = event["home_team"]
+            game.away_team = event["away_team"]
+        return game
+
+    upserted_events: list[tuple[dict, Game]] = []
+    game_errors = 0
+    try:
+        with session.begin_nested():
+            for event in events:
+                try:
+                    upserted_events.append((event, upsert_game(event)))
+                except Exception:
+                    game_errors += 1
+                    if delta_hash_strict:
+                        raise
+            session.flush()
+    except Exception:
+        if delta_hash_strict:
+            raise
+        # A row the database rejected rolled back the whole batch; redo the
+        # upserts one savepoint per event so only the bad events are lost.
+        games_by_event_id = dict(persisted_games)
+        upserted_events = []
+        game_errors = 0
+        for event in events:
+            try:
+                with session.begin_nested():
+                    game = upsert_game(event)
+                    session.flush()
+            except Exception:
+                game_errors += 1
+                games_by_event_id = {
+                    event_id: game for event_id, game in games_by_event_id.items() if game in session
+                }
+                continue
+            upserted_events.append((event, game))
+    summary["games_upserted"] += len(upserted_events)
+    summary["errors_count"] += game_errors
+
+    # Likewise fetch all existing groups for those games at once, keyed the
+    # same way as grouped_outcomes below.
+    existing_groups: dict[tuple[int, str, str, float | None], tuple[int, str]] = {}
+    if existing_game_ids:
+        existing_groups = {
+            (game_id, market_key, bookmaker, float(point) if point is not None else None): (group_id, last_hash)
+            for group_id, game_id, market_key, bookmaker, point, last_hash in session.execute(
+                select(
+                    OddsGroup.id,
+                    OddsGroup.game_id,
+                    OddsGroup.market_key,
+                    OddsGroup.bookmaker,
+                    OddsGroup.point,
+                    OddsGroup.last_hash,
+                ).where(OddsGroup.game_id.in_(existing_game_ids))
+            )
+        }
+
+    for event, game in upserted_events:
+        event_snapshot_rows: list[dict] = []
+        event_new_group_rows: list[dict] = []
+        event_group_updates: list[dict] = []
+        event_new_group_keys: list[tuple[int, str, str, float | None]] = []
+        event_updated_group_keys: list[tuple[int, str, str, float | None]] = []
         try:
-            game = session.execute(select(Game).where(Game.event_id == event["id"])).scalar_one_or_none()
-            if game is None:
-                game = Game(
-                    sport_key=event["sport_key"],
-                    event_id=event["id"],
-                    commence_time=parse_commence_time_to_utc(event["commence_time"]),
-                    home_team=event["home_team"],
-                    away_team=event["away_team"],
-                )
-                session.add(game)
-                session.flush()
-                summary["games_upserted"] += 1
-            else:
-                game.sport_key = event["sport_key"]
-                game.commence_time = parse_commence_time_to_utc(event["commence_time"])
-                game.home_team = event["home_team"]
-                game.away_team = event["away_team"]
-                summary["games_upserted"] += 1
-
-            for book in sorted(event.get("bookmakers", []), key=lambda b: b["key"]):
+            home_key = event["home_team"].strip().lower()
+            away_key = event["away_team"].strip().lower()
+            for book in sorted(event.get("bookmakers", []), key=_by_key):
                 bookmaker_key = book["key"]
                 if bookmaker_filter and bookmaker_key not in bookmaker_filter:
                     continue
 
-                grouped_outcomes: dict[tuple[str, str, float | None], list[dict]] = defaultdict(list)
-                for market in sorted(book.get("markets", []), key=lambda m: m["key"]):
+                # Each group's sort key is built once when the group is first
+                # seen (null points as -inf), so ordering the groups needs no
+                # per-comparison Python callback.
+                grouped_outcomes: dict[tuple[str, str, float | None], list[dict]] = {}
+                group_order: dict[tuple[str, str, float | None], tuple[str, str, float]] = {}
+                for market in sorted(book.get("markets", []), key=_by_key):
                     market_key = market["key"]
-                    if market_key not in settings.odds_markets:
+                    if market_key not in market_filter:
                         continue
+                    market_lower = market_key.lower()
                     for outcome in market.get("outcomes", []):
-                        side = normalize_side(
-                            event_home=event["home_team"],
-                            event_away=event["away_team"],
-                            market_key=market_key,
-                            outcome_name=outcome["name"],
-                        )
+                        side = _normalize_outcome_side(home_key, away_key, market_lower, outcome["name"])
                         point = outcome.get("point")
                         canonical_point = canonical_group_point(market_key, point)
                         american = outcome.get("price")
-                        decimal = american_to_decimal(american) if american is not None else None
-                        implied = american_to_implied_prob(american) if american is not None else None
-                        grouped_outcomes[(market_key, bookmaker_key, canonical_point)].append(
+                        if american is not None:
+                            decimal, implied = american_to_decimal_and_implied_prob(american)
+                        else:
+                            decimal = implied = None
+                        group_key = (market_key, bookmaker_key, canonical_point)
+                        group = grouped_outcomes.get(group_key)
+                        if group is None:
+                            group = grouped_outcomes[group_key] = []
+                            group_order[group_key] = (
+                                market_key,
+                                bookmaker_key,
+                                _NULL_POINT_ORDER if canonical_point is None else canonical_point,
+                            )
+                        group.append(
                             {
                                 "side": side.value,
                                 "american": american,
@@ -180,27 +302,18 @@ def ingest_odds_for_sport(session: "Session", sport_key: str) -> dict:
                             }
                         )
 
-                for market_key, bookmaker, point in sorted(
-                    grouped_outcomes.keys(), key=lambda key: sort_group_key(event["id"], key)
-                ):
-                    side_prices = sorted(grouped_outcomes[(market_key, bookmaker, point)], key=lambda sp: sp["side"])
-                    _, group_hash = build_normalized_group_representation(
+                for market_key, bookmaker, point in sorted(grouped_outcomes, key=group_order.__getitem__):
+                    side_prices = sorted(grouped_outcomes[(market_key, bookmaker, point)], key=_by_side_name)
+                    group_hash = compute_group_hash(
                         event_id=event["id"],
                         market_key=market_key,
                         bookmaker=bookmaker,
                         point=point,
                         side_prices=side_prices,
                     )
-                    existing_group = session.execute(
-                        select(OddsGroup).where(
-                            OddsGroup.game_id == game.id,
-                            OddsGroup.market_key == market_key,
-                            OddsGroup.bookmaker == bookmaker,
-                            OddsGroup.point == point,
-                        )
-                    ).scalar_one_or_none()
+                    existing_group = existing_groups.get((game.id, market_key, bookmaker, point))
 
-                    if existing_group and existing_group.last_hash == group_hash:
+                    if existing_group is not None and existing_group[1] == group_hash:
                         summary["groups_skipped"] += 1
                         continue
 
@@ -211,13 +324,7 @@ def ingest_odds_for_sport(session: "Session", sport_key: str) -> dict:
                         side_price["side"]: fair_prob
                         for side_price, fair_prob in zip(side_prices, fair_probs, strict=True)
                     }
-                    required_opposite = {
-                        Side.HOME.value: Side.AWAY.value,
-                        Side.AWAY.value: Side.HOME.value,
-                        Side.OVER.value: Side.UNDER.value,
-                        Side.UNDER.value: Side.OVER.value,
-                    }
-                    for side_value, opposite_side in required_opposite.items():
+                    for side_value, opposite_side in _OPPOSITE_SIDE_VALUES.items():
                         if side_value in side_to_fair_prob and opposite_side in side_to_fair_prob and side_to_fair_prob[side_value] > 0.95:
                             logger.warning(
                                 "Suspicious fair_prob in ingestion: event_id=%s market_key=%s bookmaker=%s point=%s side=%s fair_prob=%.6f opposite_side=%s opposite_fair_prob=%.6f",
@@ -231,43 +338,75 @@ def ingest_odds_for_sport(session: "Session", sport_key: str) -> dict:
                                 side_to_fair_prob[opposite_side],
                             )
 
+                    # Numeric columns take the floats as-is; the database
+                    # applies each column's scale on insert.
                     for side_price, fair_prob in zip(side_prices, fair_probs, strict=True):
-                        snapshot = OddsSnapshot(
-                            game_id=game.id,
-                            captured_at=captured_at,
-                            market_key=market_key,
-                            bookmaker=bookmaker,
-                            side=side_price["side"],
-                            point=Decimal(str(side_price["point"])) if side_price["point"] is not None else None,
-                            american=side_price["american"],
-                            decimal=Decimal(str(side_price["decimal"])) if side_price["decimal"] is not None else None,
-                            implied_prob=Decimal(str(side_price["implied_prob"])),
-                            fair_prob=Decimal(str(fair_prob)),
-                            group_hash=group_hash,
+                        event_snapshot_rows.append(
+                            {
+                                "game_id": game.id,
+                                "captured_at": captured_at,
+                                "market_key": market_key,
+                                "bookmaker": bookmaker,
+                                "side": side_price["side"],
+                                "point": side_price["point"],
+                                "american": side_price["american"],
+                                "decimal": side_price["decimal"],
+                                "implied_prob": side_price["implied_prob"],
+                                "fair_prob": fair_prob,
+                                "group_hash": group_hash,
+                            }
                         )
-                        session.add(snapshot)
-                        summary["snapshot_rows_inserted"] += 1
 
+                    group_key = (game.id, market_key, bookmaker, point)
                     if existing_group is None:
-                        session.add(
-                            OddsGroup(
-                                game_id=game.id,
-                                market_key=market_key,
-                                bookmaker=bookmaker,
-                                point=Decimal(str(point)) if point is not None else None,
-                                last_hash=group_hash,
-                                last_captured_at=captured_at,
-                            )
+                        event_new_group_keys.append(group_key)
+                        event_new_group_rows.append(
+                            {
+                                "game_id": game.id,
+                                "market_key": market_key,
+                                "bookmaker": bookmaker,
+                                "point": point,
+                                "last_hash": group_hash,
+                                "last_captured_at": captured_at,
+                            }
                         )
                     else:
-                        existing_group.last_hash = group_hash
-                        existing_group.last_captured_at = captured_at
-                    summary["groups_changed"] += 1
+                        event_updated_group_keys.append(group_key)
+                        event_group_updates.append(
+                            {"id": existing_group[0], "last_hash": group_hash, "last_captured_at": captured_at}
+                        )
 
+            # Each event's rows go out as executemany batches inside their
+            # own savepoint, so a failed write rolls back just this event
+            # rather than poisoning the session for the rest of the run.
+            with session.begin_nested():
+                if event_snapshot_rows:
+                    session.execute(insert(OddsSnapshot), event_snapshot_rows)
+                new_group_ids: list[int] = []
+                if event_new_group_rows:
+                    new_group_ids = list(
+                        session.execute(
+                            insert(OddsGroup).returning(OddsGroup.id, sort_by_parameter_order=True),
+                            event_new_group_rows,
+                        ).scalars()
+                    )
+                if event_group_updates:
+                    session.execute(update(OddsGroup), event_group_updates)
         except Exception:
             summary["errors_count"] += 1
-            if settings.delta_hash_strict:
+            if delta_hash_strict:
                 raise
+            continue
+
+        # Later events in the same payload (e.g. a repeated event id) must see
+        # the groups this event just wrote, as the per-group lookups used to.
+        for group_key, group_id, row in zip(event_new_group_keys, new_group_ids, event_new_group_rows, strict=True):
+            existing_groups[group_key] = (group_id, row["last_hash"])
+        for group_key, row in zip(event_updated_group_keys, event_group_updates, strict=True):
+            existing_groups[group_key] = (row["id"], row["last_hash"])
+
+        summary["snapshot_rows_inserted"] += len(event_snapshot_rows)
+        summary["groups_changed"] += len(event_new_group_rows) + len(event_group_updates)
 
     session.commit()
     return summary
@@ -1,14 +1,16 @@
 from __future__ import annotations
 
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
-from statistics import mean, median
 
-from sqlalchemy import and_, select
+from sqlalchemy import Float, and_, case, cast, func, or_, select
 from sqlalchemy.orm import Session
 
 from app.eval.service import gates_report, pqs_clv_report
 from app.models import Game, Pick, PickScore
 
+CLV_HEALTH_BATCH_SIZE = 1000
+
 
 def _safe_float(value: object) -> float | None:
     if value is None:
@@ -16,49 +18,123 @@ def _safe_float(value: object) -> float | None:
     return float(value)
 
 
-def _compute_bucket(rows: list[tuple[Pick, Game]]) -> dict[str, object]:
-    total = len(rows)
-    computed = [pick for pick, _game in rows if pick.clv_computed_at is not None]
-    market_values = [float(pick.market_clv) for pick in computed if pick.market_clv is not None]
-    book_values = [float(pick.book_clv) for pick in computed if pick.book_clv is not None]
-    positives = [value for value in market_values if value > 0]
+def _median(values: list[float]) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    mid = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[mid]
+    return (ordered[mid - 1] + ordered[mid]) / 2
+
+
+@dataclass
+class _ClvBucket:
+    total: int = 0
+    computed: int = 0
+    market_n: int = 0
+    market_sum: float = 0.0
+    market_positive: int = 0
+    book_n: int = 0
+    book_sum: float = 0.0
+    market_values: list[float] = field(default_factory=list)
+    book_values: list[float] = field(default_factory=list)
+
+    def merge(self, other: _ClvBucket) -> None:
+        self.total += other.total
+        self.computed += other.computed
+        self.market_n += other.market_n
+        self.market_sum += other.market_sum
+        self.market_positive += other.market_positive
+        self.book_n += other.book_n
+        self.book_sum += other.book_sum
+        self.market_values.extend(other.market_values)
+        self.book_values.extend(other.book_values)
 
+
+def _compute_bucket(bucket: _ClvBucket) -> dict[str, object]:
+    total = bucket.total
+    market_n = bucket.market_n
+    book_n = bucket.book_n
     return {
         "total_picks": total,
-        "clv_computed_count": len(computed),
-        "clv_coverage_rate": (len(computed) / total) if total else 0.0,
-        "median_market_clv": median(market_values) if market_values else None,
-        "mean_market_clv": mean(market_values) if market_values else None,
-        "median_book_clv": median(book_values) if book_values else None,
-        "mean_book_clv": mean(book_values) if book_values else None,
-        "pct_positive_market_clv": (len(positives) / len(market_values)) if market_values else 0.0,
+        "clv_computed_count": bucket.computed,
+        "clv_coverage_rate": (bucket.computed / total) if total else 0.0,
+        "median_market_clv": _median(bucket.market_values),
+        "mean_market_clv": (bucket.market_sum / market_n) if market_n else None,
+        "median_book_clv": _median(bucket.book_values),
+        "mean_book_clv": (bucket.book_sum / book_n) if book_n else None,
+        "pct_positive_market_clv": (bucket.market_positive / market_n) if market_n else 0.0,
     }
 
 
 def compute_clv_health(session: Session, days: int = 7) -> dict[str, object]:
     now_utc = datetime.now(timezone.utc)
     window_start = now_utc - timedelta(days=days)
+    in_window = and_(Pick.created_at >= window_start, Pick.created_at <= now_utc)
+
+    # CLV values only count once computed, matching clv_computed_count.
+    computed = Pick.clv_computed_at.is_not(None)
+    market_clv = cast(case((computed, Pick.market_clv)), Float)
+    book_clv = cast(case((computed, Pick.book_clv)), Float)
 
-    rows = (
-        session.execute(
-            select(Pick, Game)
-            .join(Game, Pick.game_id == Game.id)
-            .where(and_(Pick.created_at >= window_start, Pick.created_at <= now_utc))
-            .order_by(Game.sport_key.asc(), Pick.created_at.asc(), Pick.id.asc())
+    # Counts, sums and the positive count are aggregated per sport in SQL.
+    sport_buckets: dict[str, _ClvBucket] = {}
+    for sport_key, total, computed_n, market_n, market_sum, market_positive, book_n, book_sum in session.execute(
+        select(
+            Game.sport_key,
+            func.count(),
+            func.count(Pick.clv_computed_at),
+            func.count(market_clv),
+            func.sum(market_clv),
+            func.count(case((market_clv > 0, 1))),
+            func.count(book_clv),
+            func.sum(book_clv),
         )
-        .all()
-    )
+        .join(Game, Pick.game_id == Game.id)
+        .where(in_window)
+        .group_by(Game.sport_key)
+    ):
+        sport_buckets[sport_key] = _ClvBucket(
+            total=total,
+            computed=computed_n,
+            market_n=market_n,
+            market_sum=market_sum or 0.0,
+            market_positive=market_positive,
+            book_n=book_n,
+            book_sum=book_sum or 0.0,
+        )
+
+    # Medians have no portable SQL aggregate (percentile_cont is Postgres
+    # only), so stream just the non-null computed values and sort in Python.
+    for sport_key, market_value, book_value in session.execute(
+        select(Game.sport_key, market_clv, book_clv)
+        .join(Game, Pick.game_id == Game.id)
+        .where(in_window, computed, or_(Pick.market_clv.is_not(None), Pick.book_clv.is_not(None)))
+        .execution_options(yield_per=CLV_HEALTH_BATCH_SIZE)
+    ):
+        bucket = sport_buckets[sport_key]
+        if market_value is not None:
+            bucket.market_values.append(market_value)
+        if book_value is not None:
+            bucket.book_values.append(book_value)
 
-    overall = _compute_bucket(rows)
+    overall_bucket = _ClvBucket()
     by_sport: dict[str, dict[str, object]] = {}
-    sport_keys = sorted({game.sport_key for _pick, game in rows})
-    for sport_key in sport_keys:
-        sport_rows = [(pick, game) for pick, game in rows if game.sport_key == sport_key]
-        by_sport[sport_key] = _compute_bucket(sport_rows)
+    for sport_key in sorted(sport_buckets):
+        bucket = sport_buckets[sport_key]
+        overall_bucket.merge(bucket)
+        by_sport[sport_key] = _compute_bucket(bucket)
+    overall = _compute_bucket(overall_bucket)
 
-    latest_scores = session.execute(select(PickScore)).scalars().all()
-    kept = [r for r in latest_scores if r.decision in {"KEEP", "WARN"}]
-    keep_rate = (len(kept) / len(latest_scores)) if latest_scores else 0.0
+    score_count, kept_count, pqs_avg = session.execute(
+        select(
+            func.count(),
+            func.count(case((PickScore.decision.in_(("KEEP", "WARN")), 1))),
+            cast(func.avg(PickScore.pqs), Float),
+        ).select_from(PickScore)
+    ).one()
+    keep_rate = (kept_count / score_count) if score_count else 0.0
 
     eval_pqs = pqs_clv_report(session, min_n=5)
     eval_gates = gates_report(session, min_n=5)
@@ -70,7 +146,7 @@ def compute_clv_health(session: Session, days: int = 7) -> dict[str, object]:
         **overall,
         "by_sport": by_sport,
         "keep_rate": keep_rate,
-        "avg_pqs": (sum(float(r.pqs) for r in latest_scores) / len(latest_scores)) if latest_scores else 0.0,
+        "avg_pqs": pqs_avg if score_count else 0.0,
         "eval_summary": {
             "eval_window_start": window_start,
             "eval_window_end": now_utc,
@@ -1,24 +1,45 @@
 from __future__ import annotations
 
+import heapq
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 
-from sqlalchemy import and_, desc, select
+from sqlalchemy import Float, and_, bindparam, cast, desc, insert, select, update
 from sqlalchemy.orm import aliased
 from sqlalchemy.orm import Session
 
 from app.config import get_settings
-from app.core.math import ev_percent, kelly_fraction
+from app.core.math import PLACES_4, PLACES_5, PLACES_6, PLACES_8, ev_and_kelly_fraction, to_decimal
 from app.domain.enums import PickScoreDecision
 from app.intelligence.features import compute_features
-from app.intelligence.pqs import adaptive_thresholds, score_pick
+from app.intelligence.pqs import adaptive_thresholds, score_picks
 from app.intelligence.priors import get_latest_prior
 from app.models import Game, Pick, PickScore
 from app.services.consensus import build_market_views, compute_consensus_for_view, get_latest_group_rows
 
 
-def _to_decimal(value: float, places: str) -> Decimal:
-    return Decimal(str(value)).quantize(Decimal(places))
+# Lookup statements for generate_consensus_picks, built once with bound (and
+# expanding IN) parameters so each run reuses the same compiled SQL.
+_GAME_IDS_BY_EVENT_STMT = select(Game.event_id, Game.id).where(
+    Game.event_id.in_(bindparam("event_ids", expanding=True))
+)
+_EXISTING_PICKS_STMT = select(
+    Pick.id,
+    Pick.created_at,
+    Pick.game_id,
+    Pick.market_key,
+    Pick.side,
+    Pick.best_book,
+    Pick.captured_at_max,
+    Pick.point,
+).where(
+    Pick.game_id.in_(bindparam("game_ids", expanding=True)),
+    Pick.market_key == bindparam("market_key"),
+)
+_SCORED_PICK_IDS_STMT = select(PickScore.pick_id).where(
+    PickScore.pick_id.in_(bindparam("pick_ids", expanding=True)),
+    PickScore.version == bindparam("version"),
+)
 
 
 def _base_summary() -> dict[str, int]:
@@ -41,18 +62,21 @@ def _select_final_keep_ids(
     kept_candidates: list[tuple[float, str, str, str, str, datetime, int, int]],
     run_max_picks_total: int,
 ) -> set[int]:
-    kept_sorted = sorted(
-        kept_candidates,
-        key=lambda item: (-item[0], item[1], item[2], item[3], item[5], item[6]),
-    )
+    # Heapify and pop in rank order only until the run cap fills, instead of
+    # sorting every candidate. pick_id makes each key unique, so the heap never
+    # compares the candidate tuples themselves.
+    ranked = [
+        ((-item[0], item[1], item[2], item[3], item[5], item[6]), item)
+        for item in kept_candidates
+    ]
+    heapq.heapify(ranked)
     per_sport: dict[str, int] = {}
     final_keep_ids: set[int] = set()
-    for _pqs, sport, _market, _event, _side, _created_at, pick_id, adaptive_max_picks in kept_sorted:
+    while ranked and len(final_keep_ids) < run_max_picks_total:
+        _key, (_pqs, sport, _market, _event, _side, _created_at, pick_id, adaptive_max_picks) = heapq.heappop(ranked)
         max_sport = max(1, adaptive_max_picks)
         if per_sport.get(sport, 0) >= max_sport:
             continue
-        if len(final_keep_ids) >= run_max_picks_total:
-            break
         per_sport[sport] = per_sport.get(sport, 0) + 1
         final_keep_ids.add(pick_id)
     return final_keep_ids
@@ -61,7 +85,9 @@ def generate_consensus_picks(session: Session, sport_key: str, market_key: str,
     settings = get_settings()
     rows = get_latest_group_rows(session=session, sport_key=sport_key, market_key=market_key)
     views = build_market_views(rows)
-    results = [compute_consensus_for_view(views[key]) for key in sorted(views.keys())]
+    # Keep each result next to the view it came from, in view-key order.
+    ordered_views = [views[key] for key in sorted(views.keys())]
+    results = [compute_consensus_for_view(view) for view in ordered_views]
     summary = _base_summary()
     summary["total_views"] = len(results)
     if not results:
@@ -70,21 +96,41 @@ def generate_consensus_picks(session: Session, sport_key: str, market_key: str,
     event_to_game_id = {
         event_id: game_id
         for event_id, game_id in session.execute(
-            select(Game.event_id, Game.id).where(Game.event_id.in_([result.event_id for result in results]))
+            _GAME_IDS_BY_EVENT_STMT, {"event_ids": [result.event_id for result in results]}
         ).all()
     }
 
+    # Load the identity columns of every existing pick on these games and this
+    # market once, keyed like the uq_pick_snapshot constraint, instead of one
+    # SELECT per candidate.
+    existing_picks: dict[tuple, tuple[int, datetime] | None] = {
+        (game_id, market, side, book, captured_at_max, point): (pick_id, created_at)
+        for pick_id, created_at, game_id, market, side, book, captured_at_max, point in session.execute(
+            _EXISTING_PICKS_STMT, {"game_ids": list(set(event_to_game_id.values())), "market_key": market_key}
+        )
+    }
+
     kept_candidates: list[tuple[float, str, str, str, str, datetime, int, int]] = []
     new_pick_ids: set[int] = set()
 
     now_utc = datetime.now(timezone.utc)
-    for result in results:
-        view_key = (result.event_id, result.market_key, result.point)
-        market_view = views.get(view_key)
-        if market_view is None:
-            continue
 
-        if result.consensus_probs is None or result.included_books < settings.pick_min_books:
+    # Bind the settings read per candidate to locals once.
+    pick_min_books = settings.pick_min_books
+    pick_min_ev = settings.pick_min_ev
+    kelly_cap = settings.kelly_cap
+    kelly_multiplier = settings.kelly_multiplier
+    kelly_max_cap = settings.kelly_max_cap
+    bankroll_paper = settings.bankroll_paper
+    pqs_version = settings.pqs_version
+
+    # First pass: filter candidates and collect rows for picks that do not
+    # exist yet, so they can be inserted in one executemany below.
+    candidates: list[tuple] = []
+    new_pick_rows: list[dict[str, object]] = []
+    new_pick_keys: list[tuple] = []
+    for result, market_view in zip(results, ordered_views, strict=True):
+        if result.consensus_probs is None or result.included_books < pick_min_books:
             summary["skipped_insufficient_books"] += 1
             continue
 
@@ -92,6 +138,7 @@ def generate_consensus_picks(session: Session, sport_key: str, market_key: str,
         if game_id is None:
             continue
 
+        point_value = Decimal(str(result.point)) if result.point is not None else None
         for side, probability in result.consensus_probs.items():
             best_decimal = result.best_decimal.get(side)
             best_book = result.best_book.get(side)
@@ -99,145 +146,207 @@ def generate_consensus_picks(session: Session, sport_key: str, market_key: str,
                 continue
             summary["candidates"] += 1
 
-            ev = ev_percent(probability, best_decimal)
-            if ev < settings.pick_min_ev:
+            ev, kelly = ev_and_kelly_fraction(probability, best_decimal, kelly_multiplier=kelly_multiplier, max_cap=kelly_max_cap)
+            if ev < pick_min_ev:
                 summary["skipped_low_ev"] += 1
                 continue
 
-            kelly = min(
-                settings.kelly_cap,
-                kelly_fraction(probability, best_decimal, kelly_multiplier=settings.kelly_multiplier, max_cap=settings.kelly_max_cap),
-            )
+            kelly = min(kelly_cap, kelly)
             if kelly <= 0:
                 continue
 
-            point_value = Decimal(str(result.point)) if result.point is not None else None
-            exists_conditions = [
-                Pick.game_id == game_id,
-                Pick.market_key == result.market_key,
-                Pick.side == side.value,
-                Pick.best_book == best_book,
-                Pick.captured_at_max == result.captured_at_max,
-            ]
-            exists_conditions.append(Pick.point.is_(None) if point_value is None else Pick.point == point_value)
-            existing_pick = session.execute(select(Pick).where(and_(*exists_conditions)).limit(1)).scalars().first()
-
-            if existing_pick is not None:
-                pick = existing_pick
+            pick_key = (game_id, result.market_key, side.value, best_book, result.captured_at_max, point_value)
+            if pick_key in existing_picks:
                 summary["skipped_existing"] += 1
             else:
-                stake = settings.bankroll_paper * kelly
-                pick = Pick(
-                    game_id=game_id,
-                    market_key=result.market_key,
-                    side=side.value,
-                    point=point_value,
-                    source="CONSENSUS",
-                    consensus_prob=_to_decimal(probability, "0.00000001"),
-                    best_decimal=_to_decimal(best_decimal, "0.00001"),
-                    best_book=best_book,
-                    ev=_to_decimal(ev, "0.00000001"),
-                    kelly_fraction=_to_decimal(kelly, "0.00000001"),
-                    stake=_to_decimal(stake, "0.0001"),
-                    consensus_books=result.included_books,
-                    sharp_books=result.sharp_books_included,
-                    captured_at_min=result.captured_at_min,
-                    captured_at_max=result.captured_at_max,
-                )
+                stake = bankroll_paper * kelly
+                pick_row: dict[str, object] = {
+                    "game_id": game_id,
+                    "market_key": result.market_key,
+                    "side": side.value,
+                    "point": point_value,
+                    "source": "CONSENSUS",
+                    "consensus_prob": to_decimal(probability, PLACES_8),
+                    "best_decimal": to_decimal(best_decimal, PLACES_5),
+                    "best_book": best_book,
+                    "ev": to_decimal(ev, PLACES_8),
+                    "kelly_fraction": to_decimal(kelly, PLACES_8),
+                    "stake": to_decimal(stake, PLACES_4),
+                    "consensus_books": result.included_books,
+                    "sharp_books": result.sharp_books_included,
+                    "captured_at_min": result.captured_at_min,
+                    "captured_at_max": result.captured_at_max,
+                }
                 if as_of is not None:
-                    pick.created_at = as_of
-                session.add(pick)
-                session.flush()
-                new_pick_ids.add(pick.id)
-
-            prior = get_latest_prior(session, sport_key=sport_key, market_key=market_key, window_size=settings.clv_prior_window)
-            features = compute_features(
-                result=result,
-                side=side,
-                per_book_odds=market_view.book_odds,
-                ev=ev,
-                kelly_fraction=kelly,
-                best_decimal=best_decimal,
-                side_consensus_prob=probability,
-                now_utc=now_utc,
-                pick_id=pick.id,
-            )
-            pqs_result = score_pick(features=features, settings=settings, prior=prior, sport_key=sport_key)
-            summary["scored"] += 1
-
-            components = dict(pqs_result.components)
-            min_pqs, max_picks = adaptive_thresholds(settings, prior, sport_key=sport_key)
-            components["adaptive_min_pqs"] = min_pqs
-            components["adaptive_max_picks"] = float(max_picks)
-
-            score_exists = session.execute(
-                select(PickScore.id).where(PickScore.pick_id == pick.id, PickScore.version == settings.pqs_version)
-            ).scalar_one_or_none()
-            if score_exists is None:
-                session.add(
-                    PickScore(
-                        pick_id=pick.id,
-                        scored_at=now_utc,
-                        version=settings.pqs_version,
-                        pqs=_to_decimal(pqs_result.pqs, "0.000001"),
-                        components_json=components,
-                        features_json={
-                            "ev": round(features.ev, 8),
-                            "kelly_fraction": round(features.kelly_fraction, 8),
-                            "book_count": features.book_count,
-                            "sharp_book_count": features.sharp_book_count,
-                            "agreement_strength": round(features.agreement_strength, 8),
-                            "price_dispersion": round(features.price_dispersion, 8),
-                            "best_vs_consensus_edge": round(features.best_vs_consensus_edge, 8),
-                            "time_to_start_minutes": round(features.time_to_start_minutes, 6),
-                            "market_liquidity_proxy": round(features.market_liquidity_proxy, 6),
-                        },
-                        decision=pqs_result.decision.value,
-                        drop_reason=pqs_result.drop_reason,
-                    )
+                    pick_row["created_at"] = as_of
+                new_pick_rows.append(pick_row)
+                new_pick_keys.append(pick_key)
+                existing_picks[pick_key] = None
+            candidates.append((result, market_view, side, probability, best_decimal, ev, kelly, pick_key))
+
+    if new_pick_rows:
+        inserted = session.execute(
+            insert(Pick).returning(Pick.id, Pick.created_at, sort_by_parameter_order=True),
+            new_pick_rows,
+        )
+        for pick_key, (pick_id, pick_created_at) in zip(new_pick_keys, inserted, strict=True):
+            existing_picks[pick_key] = (pick_id, pick_created_at)
+            new_pick_ids.add(pick_id)
+
+    # Pick ids that already carry a score for this version, so scoring only
+    # stages rows for the rest and writes them in one executemany below.
+    candidate_pick_ids = {existing_picks[pick_key][0] for *_, pick_key in candidates}
+    scored_pick_ids = set(
+        session.execute(
+            _SCORED_PICK_IDS_STMT, {"pick_ids": list(candidate_pick_ids), "version": pqs_version}
+        ).scalars()
+    )
+    new_score_rows: list[dict[str, object]] = []
+
+    # The prior and the thresholds it drives depend only on sport and market,
+    # so they are looked up once per run.
+    prior = get_latest_prior(session, sport_key=sport_key, market_key=market_key, window_size=settings.clv_prior_window)
+    min_pqs, max_picks = adaptive_thresholds(settings, prior, sport_key=sport_key)
+
+    # Second pass: build features for every candidate against its (possibly
+    # new) pick, score them as one batch, then stage the score rows.
+    candidate_features = [
+        compute_features(
+            result=result,
+            side=side,
+            per_book_odds=market_view.book_odds,
+            ev=ev,
+            kelly_fraction=kelly,
+            best_decimal=best_decimal,
+            side_consensus_prob=probability,
+            now_utc=now_utc,
+            pick_id=existing_picks[pick_key][0],
+        )
+        for result, market_view, side, probability, best_decimal, ev, kelly, pick_key in candidates
+    ]
+    pqs_results = score_picks(features=candidate_features, settings=settings, prior=prior, sport_key=sport_key)
+    summary["scored"] = len(pqs_results)
+
+    for (result, _view, side, *_, pick_key), features, pqs_result in zip(
+        candidates, candidate_features, pqs_results, strict=True
+    ):
+        pick_id, pick_created_at = existing_picks[pick_key]
+
+        # score_pick hands back a fresh components dict on every call; gate
+        # drops return it empty, so the run thresholds are recorded here too.
+        components = pqs_result.components
+        components["adaptive_min_pqs"] = min_pqs
+        components["adaptive_max_picks"] = float(max_picks)
+
+        if pick_id not in scored_pick_ids:
+            scored_pick_ids.add(pick_id)
+            new_score_rows.append({
+                "pick_id": pick_id,
+                "scored_at": now_utc,
+                "version": pqs_version,
+                "pqs": to_decimal(pqs_result.pqs, PLACES_6),
+                "components_json": components,
+                "features_json": {
+                    "ev": round(features.ev, 8),
+                    "kelly_fraction": round(features.kelly_fraction, 8),
+                    "book_count": features.book_count,
+                    "sharp_book_count": features.sharp_book_count,
+                    "agreement_strength": round(features.agreement_strength, 8),
+                    "price_dispersion": round(features.price_dispersion, 8),
+                    "best_vs_consensus_edge": round(features.best_vs_consensus_edge, 8),
+                    "time_to_start_minutes": round(features.time_to_start_minutes, 6),
+                    "market_liquidity_proxy": round(features.market_liquidity_proxy, 6),
+                },
+                "decision": pqs_result.decision.value,
+                "drop_reason": pqs_result.drop_reason,
+            })
+
+        if pqs_result.decision == PickScoreDecision.KEEP:
+            summary["kept"] += 1
+            kept_candidates.append(
+                (
+                    pqs_result.pqs,
+                    sport_key,
+                    result.market_key,
+                    result.event_id,
+                    side.value,
+                    pick_created_at,
+                    pick_id,
+                    max_picks,
                 )
+            )
+        else:
+            summary["dropped"] += 1
 
-            if pqs_result.decision == PickScoreDecision.KEEP:
-                summary["kept"] += 1
-                kept_candidates.append(
-                    (
-                        pqs_result.pqs,
-                        sport_key,
-                        result.market_key,
-                        result.event_id,
-                        side.value,
-                        pick.created_at,
-                        pick.id,
-                        int(components.get("adaptive_max_picks", settings.sport_default_max_picks)),
-                    )
-                )
-            else:
-                summary["dropped"] += 1
+    if new_score_rows:
+        session.execute(insert(PickScore), new_score_rows)
 
     final_keep_ids = _select_final_keep_ids(kept_candidates, settings.run_max_picks_total)
 
     if settings.pqs_enabled:
-        throttled_candidates = sorted(
-            kept_candidates,
-            key=lambda item: (-item[0], item[1], item[2], item[3], item[5], item[6]),
-        )
-        for item in throttled_candidates:
-            pick_id = item[6]
-            if pick_id not in final_keep_ids:
-                score_row = session.execute(
-                    select(PickScore).where(PickScore.pick_id == pick_id, PickScore.version == settings.pqs_version)
-                ).scalars().first()
-                if score_row is not None:
-                    score_row.decision = PickScoreDecision.DROP.value
-                    score_row.drop_reason = "cap_throttle"
-
-    summary["inserted"] = len(final_keep_ids.intersection(new_pick_ids))
+        # Ranking already happened in _select_final_keep_ids; demote every
+        # other kept pick's score in one UPDATE.
+        throttled_ids = [item[6] for item in kept_candidates if item[6] not in final_keep_ids]
+        if throttled_ids:
+            session.execute(
+                update(PickScore)
+                .where(PickScore.pick_id.in_(throttled_ids), PickScore.version == pqs_version)
+                .values(decision=PickScoreDecision.DROP.value, drop_reason="cap_throttle")
+                .execution_options(synchronize_session=False)
+            )
+
+    # final_keep_ids is bounded by run_max_picks_total, so count its new picks
+    # directly rather than materializing an intersection set.
+    summary["inserted"] = sum(1 for pick_id in final_keep_ids if pick_id in new_pick_ids)
     session.commit()
     return summary
 
 
 def list_picks(session: Session, sport_key: str | None, market_key: str | None, date: str | None, limit: int = 100) -> list[dict[str, object]]:
-    stmt = select(Pick, Game).join(Game, Pick.game_id == Game.id).order_by(desc(Pick.created_at), desc(Pick.id)).limit(limit)
+    # Join each pick to its latest score for the active version in the same
+    # query, so the KEEP/WARN filter runs in SQL instead of once per row.
+    latest_score_id = (
+        select(PickScore.id)
+        .where(PickScore.pick_id == Pick.id, PickScore.version == get_settings().pqs_version)
+        .order_by(desc(PickScore.scored_at), desc(PickScore.id))
+        .limit(1)
+        .correlate(Pick)
+        .scalar_subquery()
+    )
+    # Project plain columns (numerics cast to floats in SQL) so rows come back
+    # without ORM hydration or per-field Decimal conversion.
+    stmt = (
+        select(
+            Pick.id,
+            Pick.created_at,
+            Game.sport_key,
+            Game.event_id,
+            Game.commence_time,
+            Game.home_team,
+            Game.away_team,
+            Pick.market_key,
+            Pick.side,
+            cast(Pick.point, Float).label("point"),
+            Pick.source,
+            cast(Pick.consensus_prob, Float).label("consensus_prob"),
+            cast(Pick.best_decimal, Float).label("best_decimal"),
+            Pick.best_book,
+            cast(Pick.ev, Float).label("ev"),
+            cast(Pick.kelly_fraction, Float).label("kelly_fraction"),
+            cast(Pick.stake, Float).label("stake"),
+            Pick.consensus_books,
+            Pick.sharp_books,
+            Pick.captured_at_min,
+            Pick.captured_at_max,
+            cast(PickScore.pqs, Float).label("pqs"),
+            PickScore.decision.label("pqs_decision"),
+        )
+        .join(Game, Pick.game_id == Game.id)
+        .join(PickScore, PickScore.id == latest_score_id)
+        .where(PickScore.decision.in_([PickScoreDecision.KEEP.value, PickScoreDecision.WARN.value]))
+        .order_by(desc(Pick.created_at), desc(Pick.id))
+        .limit(limit)
+    )
     conditions = []
     if sport_key:
         conditions.append(Game.sport_key == sport_key)
@@ -250,47 +359,7 @@ def list_picks(session: Session, sport_key: str | None, market_key: str | None,
     if conditions:
         stmt = stmt.where(and_(*conditions))
 
-    rows = session.execute(stmt).all()
-    output: list[dict[str, object]] = []
-    for pick, game in rows:
-        score = (
-            session.execute(
-                select(PickScore)
-                .where(PickScore.pick_id == pick.id, PickScore.version == get_settings().pqs_version)
-                .order_by(desc(PickScore.scored_at), desc(PickScore.id))
-                .limit(1)
-            )
-            .scalars()
-            .first()
-        )
-        if score is None or score.decision not in {PickScoreDecision.KEEP.value, PickScoreDecision.WARN.value}:
-            continue
-        output.append({
-            "id": pick.id,
-            "created_at": pick.created_at,
-            "sport_key": game.sport_key,
-            "event_id": game.event_id,
-            "commence_time": game.commence_time,
-            "home_team": game.home_team,
-            "away_team": game.away_team,
-            "market_key": pick.market_key,
-            "side": pick.side,
-            "point": float(pick.point) if pick.point is not None else None,
-            "source": pick.source,
-            "consensus_prob": float(pick.consensus_prob),
-            "best_decimal": float(pick.best_decimal),
-            "best_book": pick.best_book,
-            "ev": float(pick.ev),
-            "kelly_fraction": float(pick.kelly_fraction),
-            "stake": float(pick.stake),
-            "consensus_books": pick.consensus_books,
-            "sharp_books": pick.sharp_books,
-            "captured_at_min": pick.captured_at_min,
-            "captured_at_max": pick.captured_at_max,
-            "pqs": float(score.pqs),
-            "pqs_decision": score.decision,
-        })
-    return output
+    return [dict(row._mapping) for row in session.execute(stmt)]
 
 
 def list_pick_scores(
@@ -303,7 +372,20 @@ def list_pick_scores(
     limit: int,
 ) -> list[dict[str, object]]:
     stmt = (
-        select(PickScore, Pick, Game)
+        select(
+            Pick.id.label("pick_id"),
+            Game.event_id,
+            Game.sport_key,
+            Pick.market_key,
+            Pick.side,
+            cast(PickScore.pqs, Float).label("pqs"),
+            PickScore.version,
+            PickScore.decision,
+            PickScore.drop_reason,
+            PickScore.components_json.label("components"),
+            PickScore.features_json.label("features"),
+            PickScore.scored_at,
+        )
         .join(Pick, PickScore.pick_id == Pick.id)
         .join(Game, Pick.game_id == Game.id)
         .where(PickScore.version == version)
@@ -315,26 +397,9 @@ def list_pick_scores(
     if decision:
         stmt = stmt.where(PickScore.decision == decision)
     if min_pqs is not None:
-        stmt = stmt.where(PickScore.pqs >= _to_decimal(min_pqs, "0.000001"))
+        stmt = stmt.where(PickScore.pqs >= to_decimal(min_pqs, PLACES_6))
 
-    rows = session.execute(stmt).all()
-    return [
-        {
-            "pick_id": pick.id,
-            "event_id": game.event_id,
-            "sport_key": game.sport_key,
-            "market_key": pick.market_key,
-            "side": pick.side,
-            "pqs": float(score.pqs),
-            "version": score.version,
-            "decision": score.decision,
-            "drop_reason": score.drop_reason,
-            "components": score.components_json,
-            "features": score.features_json,
-            "scored_at": score.scored_at,
-        }
-        for score, pick, game in rows
-    ]
+    return [dict(row._mapping) for row in session.execute(stmt)]
 
 
 def list_recommended_picks(
@@ -354,7 +419,19 @@ def list_recommended_picks(
 
     latest_score = aliased(PickScore)
     stmt = (
-        select(Pick, Game, latest_score)
+        select(
+            Pick.id,
+            Game.sport_key,
+            Pick.market_key,
+            Pick.side,
+            cast(Pick.point, Float).label("point"),
+            Pick.created_at,
+            cast(latest_score.pqs, Float).label("pqs"),
+            cast(Pick.ev, Float).label("ev"),
+            Pick.consensus_books,
+            Pick.sharp_books,
+            latest_score.features_json,
+        )
         .join(Game, Pick.game_id == Game.id)
         .join(latest_score, latest_score.id == latest_score_id)
         .where(latest_score.decision == PickScoreDecision.KEEP.value)
@@ -368,27 +445,27 @@ def list_recommended_picks(
 
     rows = session.execute(stmt).all()
     output: list[dict[str, object]] = []
-    for pick, game, score in rows:
-        features = score.features_json if isinstance(score.features_json, dict) else {}
-        book_count = int(features.get("book_count", pick.consensus_books))
-        sharp_book_count = int(features.get("sharp_book_count", pick.sharp_books))
+    for row in rows:
+        features = row.features_json if isinstance(row.features_json, dict) else {}
+        book_count = int(features.get("book_count", row.consensus_books))
+        sharp_book_count = int(features.get("sharp_book_count", row.sharp_books))
         price_dispersion = float(features.get("price_dispersion", 0.0))
         time_to_start_minutes = float(features.get("time_to_start_minutes", 0.0))
         best_vs_consensus_edge = float(features.get("best_vs_consensus_edge", 0.0))
         why = (
-            f"PQS {float(score.pqs):.2f} | EV {float(pick.ev):.2f} | Books {book_count} "
+            f"PQS {row.pqs:.2f} | EV {row.ev:.2f} | Books {book_count} "
             f"| Disp {price_dispersion:.2f} | Starts {time_to_start_minutes / 60.0:.1f}h"
         )
         output.append(
             {
-                "pick_id": pick.id,
-                "sport_key": game.sport_key,
-                "market_key": pick.market_key,
-                "side": pick.side,
-                "point": float(pick.point) if pick.point is not None else None,
-                "created_at": pick.created_at,
-                "pqs": float(score.pqs),
-                "ev": float(pick.ev),
+                "pick_id": row.id,
+                "sport_key": row.sport_key,
+                "market_key": row.market_key,
+                "side": row.side,
+                "point": row.point,
+                "created_at": row.created_at,
+                "pqs": row.pqs,
+                "ev": row.ev,
                 "book_count": book_count,
                 "sharp_book_count": sharp_book_count,
                 "price_dispersion": price_dispersion,
@@ -1,34 +1,52 @@
 from __future__ import annotations
 
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Callable
+from functools import lru_cache
+from typing import Callable, Iterable
 
-from sqlalchemy import and_, desc, select
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, desc, func, select
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.config import Settings
 from app.intelligence.priors import recompute_clv_sport_stats
 from app.models import Game, Pick, PipelineRun
-from app.services.clv import compute_pick_clv
+from app.services.clv import CLV_BATCH_SIZE, compute_pick_clv
 from app.services.ingest import ingest_odds_for_sport
 from app.services.market_unlock import allowed_markets, get_clv_computed_count
 from app.services.picks import generate_consensus_picks
 
 
-def resolve_sports(settings: Settings) -> list[str]:
-    if settings.sports_autorun.strip():
-        sports = [part.strip() for part in settings.sports_autorun.split(",") if part.strip()]
+def _dumps_sorted(payload: dict) -> str:
+    return json.dumps(payload, sort_keys=True)
+
+
+# A cycle resolves sports and markets in every step; the parse only depends on
+# these settings strings, so it is cached and callers get a fresh list.
+@lru_cache(maxsize=8)
+def _resolve_sports(sports_autorun: str, odds_sports_whitelist: tuple[str, ...]) -> tuple[str, ...]:
+    if sports_autorun.strip():
+        sports = [part.strip() for part in sports_autorun.split(",") if part.strip()]
     else:
-        sports = list(settings.odds_sports_whitelist)
-    return sorted(set(sports))
+        sports = list(odds_sports_whitelist)
+    return tuple(sorted(set(sports)))
 
 
-def resolve_markets(settings: Settings) -> list[str]:
-    markets = [part.strip() for part in settings.markets_autorun.split(",") if part.strip()]
+@lru_cache(maxsize=8)
+def _resolve_markets(markets_autorun: str) -> tuple[str, ...]:
+    markets = [part.strip() for part in markets_autorun.split(",") if part.strip()]
     if not markets:
         markets = ["h2h"]
-    return sorted(dict.fromkeys(markets))
+    return tuple(sorted(dict.fromkeys(markets)))
+
+
+def resolve_sports(settings: Settings) -> list[str]:
+    return list(_resolve_sports(settings.sports_autorun, settings.odds_sports_whitelist))
+
+
+def resolve_markets(settings: Settings) -> list[str]:
+    return list(_resolve_markets(settings.markets_autorun))
 
 
 def _log_run(
@@ -47,13 +65,33 @@ def _log_run(
             status=status,
             sports=",".join(sports),
             markets=",".join(markets),
-            stats_json=json.dumps(stats, sort_keys=True),
+            stats_json=_dumps_sorted(stats),
             error=error,
         )
     )
     session.commit()
 
 
+_INGEST_TOTAL_KEYS = ("games_upserted", "groups_changed", "snapshot_rows_inserted", "groups_skipped")
+_PICKS_TOTAL_KEYS = (
+    "total_views",
+    "candidates",
+    "inserted",
+    "skipped_existing",
+    "skipped_low_ev",
+    "skipped_insufficient_books",
+)
+
+
+def _sum_counts(items: Iterable[dict], keys: tuple[str, ...]) -> dict[str, int]:
+    # One pass over the per-sport (or per-pair) summaries for every total.
+    totals = dict.fromkeys(keys, 0)
+    for item in items:
+        for key in keys:
+            totals[key] += item.get(key, 0)
+    return totals
+
+
 def _run_per_sport(
     sports: list[str],
     handler: Callable[[str], dict],
@@ -68,16 +106,40 @@ def _run_per_sport(
     return per_sport, errors
 
 
+def _run_per_sport_threaded(
+    sports: list[str],
+    handler: Callable[[str], dict],
+    max_workers: int,
+) -> tuple[dict[str, dict], dict[str, str]]:
+    per_sport: dict[str, dict] = {}
+    errors: dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {sport: executor.submit(handler, sport) for sport in sports}
+        for sport, future in futures.items():
+            try:
+                per_sport[sport] = future.result()
+            except Exception as exc:  # noqa: BLE001
+                errors[sport] = str(exc)
+    return per_sport, errors
+
+
 def run_ingest(session: Session, settings: Settings) -> dict:
     sports = resolve_sports(settings)
-    per_sport, errors = _run_per_sport(sports, lambda sport: ingest_odds_for_sport(session, sport))
+    max_workers = min(settings.ingest_max_workers, len(sports))
+    if max_workers > 1:
+        # Each sport is an independent API fetch plus its own transaction, so
+        # workers overlap the HTTP latency, each on a session of its own.
+        worker_session = sessionmaker(bind=session.get_bind(), autoflush=False)
 
-    totals = {
-        "games_upserted": sum(item.get("games_upserted", 0) for item in per_sport.values()),
-        "groups_changed": sum(item.get("groups_changed", 0) for item in per_sport.values()),
-        "snapshot_rows_inserted": sum(item.get("snapshot_rows_inserted", 0) for item in per_sport.values()),
-        "groups_skipped": sum(item.get("groups_skipped", 0) for item in per_sport.values()),
-    }
+        def ingest_in_worker(sport: str) -> dict:
+            with worker_session() as sport_session:
+                return ingest_odds_for_sport(sport_session, sport)
+
+        per_sport, errors = _run_per_sport_threaded(sports, ingest_in_worker, max_workers)
+    else:
+        per_sport, errors = _run_per_sport(sports, lambda sport: ingest_odds_for_sport(session, sport))
+
+    totals = _sum_counts(per_sport.values(), _INGEST_TOTAL_KEYS)
     return {
         **totals,
         "sports": sports,
@@ -144,16 +206,7 @@ def run_picks(session: Session, settings: Settings) -> dict:
             except Exception as exc:  # noqa: BLE001
                 errors[key] = str(exc)
 
-    totals = {
-        "total_views": sum(item.get("total_views", 0) for item in per_pair.values()),
-        "candidates": sum(item.get("candidates", 0) for item in per_pair.values()),
-        "inserted": sum(item.get("inserted", 0) for item in per_pair.values()),
-        "skipped_existing": sum(item.get("skipped_existing", 0) for item in per_pair.values()),
-        "skipped_low_ev": sum(item.get("skipped_low_ev", 0) for item in per_pair.values()),
-        "skipped_insufficient_books": sum(
-            item.get("skipped_insufficient_books", 0) for item in per_pair.values()
-        ),
-    }
+    totals = _sum_counts(per_pair.values(), _PICKS_TOTAL_KEYS)
 
     return {
         **totals,
@@ -178,9 +231,9 @@ def run_clv(session: Session, settings: Settings, force: bool = False) -> dict:
     if not force:
         stmt = stmt.where(Pick.clv_computed_at.is_(None))
 
-    picks = session.execute(stmt).scalars().all()
+    picks = session.execute(stmt.execution_options(yield_per=CLV_BATCH_SIZE)).scalars()
     summary = {
-        "processed": len(picks),
+        "processed": 0,
         "updated": 0,
         "skipped_no_close": 0,
         "skipped_already_computed": 0,
@@ -190,15 +243,23 @@ def run_clv(session: Session, settings: Settings, force: bool = False) -> dict:
         "errors_count": 0,
     }
 
-    for pick in picks:
-        if pick.clv_computed_at is not None and not force:
-            summary["skipped_already_computed"] += 1
-            continue
+    # Stream due picks in batches; flushing and expiring each batch keeps the
+    # identity map bounded by the batch size instead of the backlog.
+    for batch in picks.partitions():
+        for pick in batch:
+            summary["processed"] += 1
+            if pick.clv_computed_at is not None and not force:
+                summary["skipped_already_computed"] += 1
+                continue
+
+            if compute_pick_clv(session, pick):
+                summary["updated"] += 1
+            else:
+                summary["skipped_no_close"] += 1
 
-        if compute_pick_clv(session, pick):
-            summary["updated"] += 1
-        else:
-            summary["skipped_no_close"] += 1
+        session.flush()
+        for pick in batch:
+            session.expire(pick)
 
     session.commit()
     return summary
@@ -255,7 +316,7 @@ def run_cycle(session: Session, settings: Settings, force: bool = False) -> dict
         sports=sports,
         markets=markets,
         stats=cycle_summary,
-        error=json.dumps(cycle_errors, sort_keys=True) if cycle_errors else None,
+        error=_dumps_sorted(cycle_errors) if cycle_errors else None,
     )
     return cycle_summary
 
@@ -281,28 +342,37 @@ def list_pipeline_runs(session: Session, limit: int = 50) -> list[dict[str, obje
     ]
 
 
+_STATUS_RUN_TYPES = ("ingest", "picks", "clv")
+
+
 def latest_run_statuses(session: Session) -> dict[str, dict[str, object] | None]:
-    output: dict[str, dict[str, object] | None] = {}
-    for run_type in ["ingest", "picks", "clv"]:
-        row = (
-            session.execute(
-                select(PipelineRun)
-                .where(PipelineRun.run_type == run_type)
-                .order_by(desc(PipelineRun.created_at), desc(PipelineRun.id))
-                .limit(1)
+    # Rank runs per type in one query and keep the newest of each.
+    ranked = (
+        select(
+            PipelineRun.run_type,
+            PipelineRun.status,
+            PipelineRun.created_at,
+            PipelineRun.error,
+            func.row_number()
+            .over(
+                partition_by=PipelineRun.run_type,
+                order_by=(desc(PipelineRun.created_at), desc(PipelineRun.id)),
             )
-            .scalars()
-            .first()
-        )
-        output[run_type] = (
-            {
-                "status": row.status,
-                "created_at": row.created_at,
-                "error": row.error,
-            }
-            if row is not None
-            else None
+            .label("rank"),
         )
+        .where(PipelineRun.run_type.in_(_STATUS_RUN_TYPES))
+        .subquery()
+    )
+    rows = session.execute(
+        select(ranked.c.run_type, ranked.c.status, ranked.c.created_at, ranked.c.error).where(ranked.c.rank == 1)
+    )
+    output: dict[str, dict[str, object] | None] = dict.fromkeys(_STATUS_RUN_TYPES)
+    for run_type, status, created_at, error in rows:
+        output[run_type] = {
+            "status": status,
+            "created_at": created_at,
+            "error": error,
+        }
     return output
 
 
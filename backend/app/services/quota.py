@@ -1,15 +1,24 @@
 from __future__ import annotations
 
+import threading
 from datetime import datetime, timezone
 from typing import Any
 
-_quota_state: dict[str, Any] = {"headers": {}, "fetched_at": None}
+# Ingest workers may record quota concurrently, so writers swap in a whole
+# (headers, fetched_at) snapshot under a lock and readers take the current
+# tuple as-is. Readers get their own copy of the headers dict, so callers
+# can't mutate the shared snapshot.
+_quota_lock = threading.Lock()
+_quota_snapshot: tuple[dict[str, str], str | None] = ({}, None)
 
 
 def record_quota(headers: dict[str, str], fetched_at: datetime) -> None:
-    _quota_state["headers"] = headers
-    _quota_state["fetched_at"] = fetched_at.astimezone(timezone.utc).isoformat()
+    global _quota_snapshot
+    snapshot = (dict(headers), fetched_at.astimezone(timezone.utc).isoformat())
+    with _quota_lock:
+        _quota_snapshot = snapshot
 
 
 def get_quota_state() -> dict[str, Any]:
-    return {"headers": dict(_quota_state["headers"]), "fetched_at": _quota_state["fetched_at"]}
+    headers, fetched_at = _quota_snapshot
+    return {"headers": dict(headers), "fetched_at": fetched_at}
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import sqlite3
+from functools import lru_cache
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import StaticPool
+
+from app.models import Base
+
+
+def _tune_sqlite(dbapi_connection, _connection_record) -> None:
+    # Hand transaction control to SQLAlchemy so SAVEPOINTs nest inside the
+    # outer BEGIN instead of pysqlite's implicit one.
+    dbapi_connection.isolation_level = None
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=MEMORY")
+    cursor.execute("PRAGMA synchronous=OFF")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def _emit_begin(connection) -> None:
+    connection.exec_driver_sql("BEGIN")
+
+
+@lru_cache(maxsize=1)
+def _schema_template() -> sqlite3.Connection:
+    template = sqlite3.connect(":memory:", check_same_thread=False)
+    ddl_engine = create_engine("sqlite+pysqlite://", creator=lambda: template, poolclass=StaticPool)
+    Base.metadata.create_all(ddl_engine)
+    return template
+
+
+def make_engine() -> Engine:
+    # Each engine gets a private in-memory database whose schema is copied
+    # page-for-page from the template instead of replaying the DDL.
+    dbapi_connection = sqlite3.connect(":memory:", check_same_thread=False)
+    _schema_template().backup(dbapi_connection)
+    engine = create_engine("sqlite+pysqlite://", creator=lambda: dbapi_connection, poolclass=StaticPool)
+    event.listen(engine, "connect", _tune_sqlite)
+    event.listen(engine, "begin", _emit_begin)
+    return engine
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from sqlalchemy.orm import Session
+
+from app.models import Game, Pick
+
+DEFAULT_COMMENCE = datetime(2025, 1, 1, 0, 0, tzinfo=timezone.utc)
+
+# Pick columns that never vary between seeded rows.
+_PICK_CONSTANTS: dict[str, object] = {
+    "market_key": "h2h",
+    "side": "HOME",
+    "point": None,
+    "source": "CONSENSUS",
+    "consensus_prob": Decimal("0.55000000"),
+    "best_decimal": Decimal("2.00000"),
+    "ev": Decimal("0.02000000"),
+    "kelly_fraction": Decimal("0.01000000"),
+    "stake": Decimal("10.0000"),
+    "consensus_books": 3,
+    "sharp_books": 1,
+}
+
+
+def insert_game(
+    session: Session,
+    *,
+    event_id: str = "evt",
+    commence_time: datetime = DEFAULT_COMMENCE,
+    sport_key: str = "basketball_nba",
+) -> Game:
+    game = Game(
+        sport_key=sport_key,
+        event_id=event_id,
+        commence_time=commence_time,
+        home_team="home",
+        away_team="away",
+    )
+    session.add(game)
+    session.flush()
+    return game
+
+
+def pick_row(
+    game_id: int,
+    created_at: datetime,
+    *,
+    best_book: str = "booka",
+    clv_done: bool = False,
+) -> dict[str, object]:
+    return {
+        **_PICK_CONSTANTS,
+        "game_id": game_id,
+        "created_at": created_at,
+        "best_book": best_book,
+        "captured_at_min": created_at,
+        "captured_at_max": created_at,
+        "clv_computed_at": created_at if clv_done else None,
+    }
+
+
+def insert_picks(session: Session, rows: list[dict[str, object]]) -> list[int]:
+    """Insert pick rows as one Core executemany and return their ids in row order."""
+    table = Pick.__table__
+    statement = table.insert().returning(table.c.id, sort_by_parameter_order=True)
+    return list(session.connection().execute(statement, rows).scalars())
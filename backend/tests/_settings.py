@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from functools import lru_cache
+
+import pytest
+
+from app import config
+from app.api import odds as api_odds
+from app.api import picks as api_picks
+from app.api import pipeline as api_pipeline
+from app.api import pqs as api_pqs
+from app.api import system as api_system
+from app.config import Settings, get_settings
+from app.eval import calibration, service as eval_service
+from app.integrations import odds_api
+from app.services import clv, consensus, ingest
+from app.services import picks as picks_service
+
+# Every module that calls get_settings at request time through its own import;
+# config itself is patched too so modules imported mid-test pick up the override.
+_SETTINGS_MODULES = (
+    config,
+    api_odds,
+    api_picks,
+    api_pipeline,
+    api_pqs,
+    api_system,
+    calibration,
+    eval_service,
+    odds_api,
+    clv,
+    consensus,
+    ingest,
+    picks_service,
+)
+
+
+@lru_cache
+def _base_settings() -> Settings:
+    return get_settings.__wrapped__()
+
+
+def use_settings(monkeypatch: pytest.MonkeyPatch, **overrides: object) -> Settings:
+    settings = replace(_base_settings(), **overrides)
+    for module in _SETTINGS_MODULES:
+        monkeypatch.setattr(module, "get_settings", lambda: settings)
+    return settings
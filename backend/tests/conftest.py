@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+
+import pytest
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.config import Settings, get_settings
+from tests._db import make_engine
+
+
+@pytest.fixture(scope="session")
+def engine() -> Engine:
+    return make_engine()
+
+
+@pytest.fixture(autouse=True)
+def _reset_settings_cache() -> Iterator[None]:
+    # Tests that set env vars read get_settings() afterwards; start and end
+    # each test with an empty cache so no parsed env leaks between them.
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+
+@pytest.fixture(scope="session")
+def default_settings() -> Settings:
+    # Built straight from the untouched process env, bypassing the app cache
+    # that other tests clear and rebuild.
+    return get_settings.__wrapped__()
+
+
+@pytest.fixture
+def db_session(engine: Engine) -> Iterator[Session]:
+    # Commits inside the test release a SAVEPOINT; the outer transaction is
+    # rolled back afterwards so every test starts from empty tables.
+    connection = engine.connect()
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
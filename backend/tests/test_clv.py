@@ -3,19 +3,28 @@ from __future__ import annotations
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 
-from sqlalchemy import create_engine
+import pytest
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
-from app.config import get_settings
-from app.models import Base, Game, OddsSnapshot, Pick
-from app.services.clv import compute_clv_for_date, compute_pick_clv
+from app.models import Game, OddsSnapshot, Pick
+from app.services import clv as clv_service
+from app.services.clv import compute_clv_for_date, compute_pick_clv, list_latest_clv
+from tests._settings import use_settings
+
+_COMMENCE = datetime(2025, 1, 2, 0, 0, tzinfo=timezone.utc)
+_CAPTURED = datetime(2025, 1, 1, 0, 0, tzinfo=timezone.utc)
+_ONE_MIN = timedelta(minutes=1)
+
+# Decimal literals for Pick columns, parsed once per module.
+_D = {s: Decimal(s) for s in ("0.01000000", "0.02000000", "0.25000000", "0.55000000", "2.10000", "3.50000", "10.0000")}
 
 
 def _insert_game(session: Session, *, event_id: str, sport_key: str = "basketball_nba") -> Game:
     game = Game(
         sport_key=sport_key,
         event_id=event_id,
-        commence_time=datetime(2025, 1, 2, 0, 0, tzinfo=timezone.utc),
+        commence_time=_COMMENCE,
         home_team="home",
         away_team="away",
     )
@@ -25,34 +34,49 @@ def _insert_game(session: Session, *, event_id: str, sport_key: str = "basketbal
 
 
 def _add_snapshot(
-    session: Session,
+    pending: list[dict[str, object]],
     *,
     game_id: int,
     captured_at: datetime,
     market_key: str,
     bookmaker: str,
     side: str,
-    fair_prob: Decimal,
-    decimal: Decimal,
-    point: Decimal | None = None,
+    fair_prob: float,
+    decimal: float,
+    point: float | None = None,
 ) -> None:
-    session.add(
-        OddsSnapshot(
-            game_id=game_id,
-            captured_at=captured_at,
-            market_key=market_key,
-            bookmaker=bookmaker,
-            side=side,
-            point=point,
-            american=-110,
-            decimal=decimal,
-            implied_prob=Decimal("0.50"),
-            fair_prob=fair_prob,
-            group_hash=f"{bookmaker}-{captured_at.timestamp()}-{side}",
-        )
+    pending.append(
+        {
+            "game_id": game_id,
+            "captured_at": captured_at,
+            "market_key": market_key,
+            "bookmaker": bookmaker,
+            "side": side,
+            "point": point,
+            "american": -110,
+            "decimal": decimal,
+            "implied_prob": 0.50,
+            "fair_prob": fair_prob,
+            "group_hash": f"{bookmaker}-{captured_at.timestamp()}-{side}",
+        }
     )
 
 
+def _flush_snapshots(session: Session, pending: list[dict[str, object]]) -> None:
+    session.execute(insert(OddsSnapshot), pending)
+    pending.clear()
+
+
+def _seed_close(session: Session, game: Game, prices: dict[str, float]) -> None:
+    # One minute before commence, each book quotes HOME 0.55 / AWAY 0.45 at its decimal price.
+    snapshots: list[dict[str, object]] = []
+    close_time = _COMMENCE - _ONE_MIN
+    for side, fair in [("HOME", 0.55), ("AWAY", 0.45)]:
+        for book, decimal in prices.items():
+            _add_snapshot(snapshots, game_id=game.id, captured_at=close_time, market_key="h2h", bookmaker=book, side=side, fair_prob=fair, decimal=decimal)
+    _flush_snapshots(session, snapshots)
+
+
 def _insert_pick(session: Session, *, game_id: int, side: str, market_key: str = "h2h", best_book: str = "booka") -> Pick:
     pick = Pick(
         game_id=game_id,
@@ -60,163 +84,189 @@ def _insert_pick(session: Session, *, game_id: int, side: str, market_key: str =
         side=side,
         point=None,
         source="CONSENSUS",
-        consensus_prob=Decimal("0.55000000"),
-        best_decimal=Decimal("2.10000"),
+        consensus_prob=_D["0.55000000"],
+        best_decimal=_D["2.10000"],
         best_book=best_book,
-        ev=Decimal("0.01000000"),
-        kelly_fraction=Decimal("0.02000000"),
-        stake=Decimal("10.0000"),
+        ev=_D["0.01000000"],
+        kelly_fraction=_D["0.02000000"],
+        stake=_D["10.0000"],
         consensus_books=2,
         sharp_books=0,
-        captured_at_min=datetime(2025, 1, 1, 0, 0, tzinfo=timezone.utc),
-        captured_at_max=datetime(2025, 1, 1, 0, 0, tzinfo=timezone.utc),
+        captured_at_min=_CAPTURED,
+        captured_at_max=_CAPTURED,
     )
     session.add(pick)
-    session.flush()
     return pick
 
 
-def test_closing_selection_uses_latest_before_commence(monkeypatch) -> None:
-    monkeypatch.setenv("CONSENSUS_MIN_BOOKS", "2")
-    monkeypatch.setenv("SHARP_BOOKS", "")
-    get_settings.cache_clear()
-
-    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
-    Base.metadata.create_all(engine)
-
-    with Session(engine) as session:
-        game = _insert_game(session, event_id="evt1")
-        before_close = game.commence_time - timedelta(minutes=1)
-        after_start = game.commence_time + timedelta(minutes=1)
-
-        _add_snapshot(session, game_id=game.id, captured_at=before_close, market_key="h2h", bookmaker="booka", side="HOME", fair_prob=Decimal("0.55"), decimal=Decimal("1.95"))
-        _add_snapshot(session, game_id=game.id, captured_at=before_close, market_key="h2h", bookmaker="booka", side="AWAY", fair_prob=Decimal("0.45"), decimal=Decimal("1.95"))
-        _add_snapshot(session, game_id=game.id, captured_at=before_close, market_key="h2h", bookmaker="bookb", side="HOME", fair_prob=Decimal("0.60"), decimal=Decimal("1.90"))
-        _add_snapshot(session, game_id=game.id, captured_at=before_close, market_key="h2h", bookmaker="bookb", side="AWAY", fair_prob=Decimal("0.40"), decimal=Decimal("1.90"))
-
-        _add_snapshot(session, game_id=game.id, captured_at=after_start, market_key="h2h", bookmaker="booka", side="HOME", fair_prob=Decimal("0.90"), decimal=Decimal("1.50"))
-        _add_snapshot(session, game_id=game.id, captured_at=after_start, market_key="h2h", bookmaker="booka", side="AWAY", fair_prob=Decimal("0.10"), decimal=Decimal("3.00"))
-
-        pick = _insert_pick(session, game_id=game.id, side="HOME", best_book="booka")
-        session.commit()
-
-        assert compute_pick_clv(session, pick) is True
-        session.commit()
-
-        assert float(pick.closing_consensus_prob) == 0.575
-        assert float(pick.market_clv) == 0.025
-
-
-def test_book_clv_uses_same_book_only(monkeypatch) -> None:
-    monkeypatch.setenv("CONSENSUS_MIN_BOOKS", "2")
-    monkeypatch.setenv("SHARP_BOOKS", "")
-    get_settings.cache_clear()
-
-    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
-    Base.metadata.create_all(engine)
-
-    with Session(engine) as session:
-        game = _insert_game(session, event_id="evt2")
-        close_time = game.commence_time - timedelta(minutes=1)
-
-        for side, fair in [("HOME", Decimal("0.55")), ("AWAY", Decimal("0.45"))]:
-            _add_snapshot(session, game_id=game.id, captured_at=close_time, market_key="h2h", bookmaker="booka", side=side, fair_prob=fair, decimal=Decimal("1.95"))
-            _add_snapshot(session, game_id=game.id, captured_at=close_time, market_key="h2h", bookmaker="bookb", side=side, fair_prob=fair, decimal=Decimal("2.20") if side == "HOME" else Decimal("1.70"))
-
-        pick = _insert_pick(session, game_id=game.id, side="HOME", best_book="booka")
-        session.commit()
+# (minutes relative to commence, bookmaker, side, fair_prob, decimal)
+_SnapshotSpec = tuple[int, str, str, float, float]
+
+CLV_SCENARIOS = [
+    pytest.param(
+        "basketball_nba",
+        [
+            (-1, "booka", "HOME", 0.55, 1.95),
+            (-1, "booka", "AWAY", 0.45, 1.95),
+            (-1, "bookb", "HOME", 0.60, 1.90),
+            (-1, "bookb", "AWAY", 0.40, 1.90),
+            (1, "booka", "HOME", 0.90, 1.50),
+            (1, "booka", "AWAY", 0.10, 3.00),
+        ],
+        {"side": "HOME", "best_book": "booka"},
+        {"closing_consensus_prob": 0.575, "market_clv": 0.025},
+        id="latest_before_commence",
+    ),
+    pytest.param(
+        "basketball_nba",
+        [
+            (-1, "booka", "HOME", 0.55, 1.95),
+            (-1, "bookb", "HOME", 0.55, 2.20),
+            (-1, "booka", "AWAY", 0.45, 1.95),
+            (-1, "bookb", "AWAY", 0.45, 1.70),
+        ],
+        {"side": "HOME", "best_book": "booka"},
+        {"closing_book_decimal": 1.95, "book_clv": 0.03663004},
+        id="book_clv_same_book_only",
+    ),
+    pytest.param(
+        "soccer_epl",
+        [
+            (-1, "booka", "HOME", 0.40, 2.10),
+            (-1, "booka", "DRAW", 0.30, 3.40),
+            (-1, "booka", "AWAY", 0.30, 2.10),
+            (-1, "bookb", "HOME", 0.42, 2.10),
+            (-1, "bookb", "DRAW", 0.28, 3.40),
+            (-1, "bookb", "AWAY", 0.30, 2.10),
+        ],
+        {"side": "DRAW", "best_book": "booka", "consensus_prob": _D["0.25000000"], "best_decimal": _D["3.50000"]},
+        {"closing_consensus_prob": 0.29, "market_clv": 0.04},
+        id="soccer_draw_market",
+    ),
+    pytest.param(
+        "basketball_nba",
+        [
+            (-1, "booka", "HOME", 0.56, 1.95),
+            (-1, "bookb", "HOME", 0.56, 1.90),
+            (-1, "booka", "AWAY", 0.44, 1.95),
+            (-1, "bookb", "AWAY", 0.44, 1.90),
+        ],
+        {"side": "HOME", "best_book": "missing-book"},
+        {"book_clv": None, "closing_book_decimal": None, "market_clv": 0.01},
+        id="missing_closing_book",
+    ),
+]
+
+
+@pytest.mark.parametrize(("sport_key", "snapshot_specs", "pick_fields", "expected"), CLV_SCENARIOS)
+def test_compute_pick_clv_scenarios(
+    monkeypatch,
+    db_session: Session,
+    sport_key: str,
+    snapshot_specs: list[_SnapshotSpec],
+    pick_fields: dict[str, object],
+    expected: dict[str, float | None],
+) -> None:
+    use_settings(monkeypatch, consensus_min_books=2, sharp_books=())
 
-        compute_pick_clv(session, pick)
-        session.commit()
+    snapshots: list[dict[str, object]] = []
+    game = _insert_game(db_session, event_id="evt1", sport_key=sport_key)
+    for minutes, book, side, fair, decimal in snapshot_specs:
+        captured_at = _COMMENCE + minutes * _ONE_MIN
+        _add_snapshot(snapshots, game_id=game.id, captured_at=captured_at, market_key="h2h", bookmaker=book, side=side, fair_prob=fair, decimal=decimal)
 
-        assert float(pick.closing_book_decimal) == 1.95
-        assert float(pick.book_clv) > 0
+    _flush_snapshots(db_session, snapshots)
+    pick = _insert_pick(db_session, game_id=game.id, side=pick_fields["side"], best_book=pick_fields["best_book"])
+    for field in ("consensus_prob", "best_decimal"):
+        if field in pick_fields:
+            setattr(pick, field, pick_fields[field])
 
+    assert compute_pick_clv(db_session, pick) is True
+    db_session.commit()
 
-def test_soccer_draw_market_clv(monkeypatch) -> None:
-    monkeypatch.setenv("CONSENSUS_MIN_BOOKS", "2")
-    monkeypatch.setenv("SHARP_BOOKS", "")
-    get_settings.cache_clear()
+    for field, value in expected.items():
+        actual = getattr(pick, field)
+        if value is None:
+            assert actual is None
+        else:
+            assert float(actual) == value
 
-    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
-    Base.metadata.create_all(engine)
 
-    with Session(engine) as session:
-        game = _insert_game(session, event_id="evt3", sport_key="soccer_epl")
-        close_time = game.commence_time - timedelta(minutes=1)
+def test_compute_clv_for_date_idempotency_and_force(monkeypatch, db_session: Session) -> None:
+    use_settings(monkeypatch, consensus_min_books=2, sharp_books=())
 
-        for book, probs in [
-            ("booka", {"HOME": Decimal("0.40"), "DRAW": Decimal("0.30"), "AWAY": Decimal("0.30")}),
-            ("bookb", {"HOME": Decimal("0.42"), "DRAW": Decimal("0.28"), "AWAY": Decimal("0.30")}),
-        ]:
-            for side, prob in probs.items():
-                _add_snapshot(session, game_id=game.id, captured_at=close_time, market_key="h2h", bookmaker=book, side=side, fair_prob=prob, decimal=Decimal("3.40") if side == "DRAW" else Decimal("2.10"))
+    game = _insert_game(db_session, event_id="evt5")
+    _seed_close(db_session, game, {"booka": 1.95, "bookb": 1.90})
+    pick = _insert_pick(db_session, game_id=game.id, side="HOME")
 
-        pick = _insert_pick(session, game_id=game.id, side="DRAW", best_book="booka")
-        pick.consensus_prob = Decimal("0.25000000")
-        pick.best_decimal = Decimal("3.50000")
-        session.commit()
+    summary1 = compute_clv_for_date(db_session, game.commence_time.date())
+    first_computed_at = pick.clv_computed_at
+    summary2 = compute_clv_for_date(db_session, game.commence_time.date())
+    summary3 = compute_clv_for_date(db_session, game.commence_time.date(), force=True)
 
-        assert compute_pick_clv(session, pick) is True
-        session.commit()
+    assert summary1["updated"] == 1
+    assert summary2["skipped_already_computed"] == 1
+    assert summary3["updated"] == 1
+    assert pick.clv_computed_at is not None
+    assert first_computed_at is not None
+    assert pick.clv_computed_at >= first_computed_at
 
-        assert float(pick.closing_consensus_prob) == 0.29
-        assert float(pick.market_clv) == 0.04
 
+def test_compute_clv_for_date_shares_closing_view_per_market(monkeypatch, db_session: Session) -> None:
+    use_settings(monkeypatch, consensus_min_books=2, sharp_books=())
 
-def test_missing_closing_book_still_computes_market_clv(monkeypatch) -> None:
-    monkeypatch.setenv("CONSENSUS_MIN_BOOKS", "2")
-    monkeypatch.setenv("SHARP_BOOKS", "")
-    get_settings.cache_clear()
+    game = _insert_game(db_session, event_id="evt6")
+    _seed_close(db_session, game, {"booka": 1.95, "bookb": 1.90})
+    home = _insert_pick(db_session, game_id=game.id, side="HOME", best_book="booka")
+    away = _insert_pick(db_session, game_id=game.id, side="AWAY", best_book="bookb")
 
-    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
-    Base.metadata.create_all(engine)
+    calls = []
+    original = clv_service.get_closing_market_view
 
-    with Session(engine) as session:
-        game = _insert_game(session, event_id="evt4")
-        close_time = game.commence_time - timedelta(minutes=1)
+    def _counting_view(session_arg, pick_arg):
+        calls.append(pick_arg.id)
+        return original(session_arg, pick_arg)
 
-        for side, fair in [("HOME", Decimal("0.56")), ("AWAY", Decimal("0.44"))]:
-            _add_snapshot(session, game_id=game.id, captured_at=close_time, market_key="h2h", bookmaker="booka", side=side, fair_prob=fair, decimal=Decimal("1.95"))
-            _add_snapshot(session, game_id=game.id, captured_at=close_time, market_key="h2h", bookmaker="bookb", side=side, fair_prob=fair, decimal=Decimal("1.90"))
+    monkeypatch.setattr(clv_service, "get_closing_market_view", _counting_view)
+    summary = compute_clv_for_date(db_session, game.commence_time.date())
 
-        pick = _insert_pick(session, game_id=game.id, side="HOME", best_book="missing-book")
-        session.commit()
+    assert summary["updated"] == 2
+    assert len(calls) == 1
+    assert float(home.closing_book_decimal) == 1.95
+    assert float(away.closing_book_decimal) == 1.90
+    assert float(home.closing_consensus_prob) == 0.55
+    assert float(away.closing_consensus_prob) == 0.45
 
-        assert compute_pick_clv(session, pick) is True
-        session.commit()
 
-        assert pick.book_clv is None
-        assert pick.closing_book_decimal is None
-        assert pick.market_clv is not None
+def test_closing_view_keeps_lowest_id_row_on_duplicate_timestamp(monkeypatch, db_session: Session) -> None:
+    use_settings(monkeypatch, consensus_min_books=2, sharp_books=())
 
+    game = _insert_game(db_session, event_id="evt8")
+    _seed_close(db_session, game, {"booka": 1.95, "bookb": 1.90})
+    _seed_close(db_session, game, {"booka": 2.50})
+    pick = _insert_pick(db_session, game_id=game.id, side="HOME", best_book="booka")
 
-def test_compute_clv_for_date_idempotency_and_force(monkeypatch) -> None:
-    monkeypatch.setenv("CONSENSUS_MIN_BOOKS", "2")
-    monkeypatch.setenv("SHARP_BOOKS", "")
-    get_settings.cache_clear()
+    assert compute_pick_clv(db_session, pick) is True
+    assert float(pick.closing_book_decimal) == 1.95
 
-    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
-    Base.metadata.create_all(engine)
 
-    with Session(engine) as session:
-        game = _insert_game(session, event_id="evt5")
-        close_time = game.commence_time - timedelta(minutes=1)
-        for side, fair in [("HOME", Decimal("0.55")), ("AWAY", Decimal("0.45"))]:
-            _add_snapshot(session, game_id=game.id, captured_at=close_time, market_key="h2h", bookmaker="booka", side=side, fair_prob=fair, decimal=Decimal("1.95"))
-            _add_snapshot(session, game_id=game.id, captured_at=close_time, market_key="h2h", bookmaker="bookb", side=side, fair_prob=fair, decimal=Decimal("1.90"))
+def test_list_latest_clv_returns_float_columns(monkeypatch, db_session: Session) -> None:
+    use_settings(monkeypatch, consensus_min_books=2, sharp_books=())
 
-        pick = _insert_pick(session, game_id=game.id, side="HOME")
-        session.commit()
+    game = _insert_game(db_session, event_id="evt7")
+    _seed_close(db_session, game, {"booka": 1.95, "bookb": 1.90})
+    pick = _insert_pick(db_session, game_id=game.id, side="HOME", best_book="booka")
+    assert compute_pick_clv(db_session, pick) is True
+    db_session.commit()
 
-        summary1 = compute_clv_for_date(session, game.commence_time.date())
-        first_computed_at = pick.clv_computed_at
-        summary2 = compute_clv_for_date(session, game.commence_time.date())
-        summary3 = compute_clv_for_date(session, game.commence_time.date(), force=True)
+    rows = list_latest_clv(db_session)
 
-        assert summary1["updated"] == 1
-        assert summary2["skipped_already_computed"] == 1
-        assert summary3["updated"] == 1
-        assert pick.clv_computed_at is not None
-        assert first_computed_at is not None
-        assert pick.clv_computed_at >= first_computed_at
+    assert len(rows) == 1
+    row = rows[0]
+    assert row["id"] == pick.id
+    assert row["event_id"] == "evt7"
+    assert row["sport_key"] == "basketball_nba"
+    assert row["consensus_prob"] == 0.55
+    assert row["closing_book_decimal"] == 1.95
+    assert isinstance(row["market_clv"], float)
+    assert row["clv_computed_at"] is not None
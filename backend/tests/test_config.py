@@ -13,7 +13,6 @@ def test_settings_defaults_for_conservative_mode(monkeypatch) -> None:
     ]:
         monkeypatch.delenv(key, raising=False)
 
-    get_settings.cache_clear()
     settings = get_settings()
 
     assert settings.consensus_min_books == 5
@@ -48,7 +47,6 @@ def test_settings_env_overrides_defaults(monkeypatch) -> None:
     monkeypatch.setenv("ENABLE_SCHEDULER", "true")
     monkeypatch.setenv("SCHED_INGEST_INTERVAL_SEC", "300")
 
-    get_settings.cache_clear()
     settings = get_settings()
 
     assert settings.consensus_min_books == 7
@@ -1,27 +1,34 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
-from decimal import Decimal
 
-from sqlalchemy import create_engine
+from sqlalchemy import insert
 from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import Session
 
 from app.domain.enums import Side
-from app.models import Base, Game, OddsSnapshot
+from app.models import Game, OddsSnapshot
 from app.services.consensus import (
     _build_latest_group_rows_stmt,
     build_market_views,
     compute_consensus_for_view,
     get_latest_group_rows,
 )
+from tests._settings import use_settings
+
+_COMMENCE = datetime(2025, 1, 1, 0, 0, tzinfo=timezone.utc)
+_TEN_MIN = timedelta(minutes=10)
+
+# Columns that are identical on every seeded snapshot row.
+_AMERICAN = -110
+_IMPLIED_PROB = 0.52
 
 
 def _insert_game(session: Session, *, event_id: str) -> Game:
     game = Game(
         sport_key="basketball_nba",
         event_id=event_id,
-        commence_time=datetime(2025, 1, 1, 0, 0, tzinfo=timezone.utc),
+        commence_time=_COMMENCE,
         home_team=f"{event_id}-home",
         away_team=f"{event_id}-away",
     )
@@ -30,270 +37,189 @@ def _insert_game(session: Session, *, event_id: str) -> Game:
     return game
 
 
-def _add_snapshot(
-    session: Session,
+def _add_book_market(
+    pending: list[dict[str, object]],
     *,
     game_id: int,
     captured_at: datetime,
     market_key: str,
     bookmaker: str,
-    side: str,
-    point: Decimal | None,
-    decimal: Decimal,
-    fair_prob: Decimal,
+    sides: list[tuple[str, float, float]],
+    point: float | None = None,
 ) -> None:
-    session.add(
-        OddsSnapshot(
-            game_id=game_id,
-            captured_at=captured_at,
-            market_key=market_key,
-            bookmaker=bookmaker,
-            side=side,
-            point=point,
-            american=-110,
-            decimal=decimal,
-            implied_prob=Decimal("0.52"),
-            fair_prob=fair_prob,
-            group_hash=f"{bookmaker}-{side}-{captured_at.timestamp()}",
-        )
+    # sides: (side, decimal, fair_prob) for every outcome this book quoted.
+    stamp = captured_at.timestamp()
+    pending.extend(
+        {
+            "game_id": game_id,
+            "captured_at": captured_at,
+            "market_key": market_key,
+            "bookmaker": bookmaker,
+            "side": side,
+            "point": point,
+            "american": _AMERICAN,
+            "decimal": decimal,
+            "implied_prob": _IMPLIED_PROB,
+            "fair_prob": fair_prob,
+            "group_hash": f"{bookmaker}-{side}-{stamp}",
+        }
+        for side, decimal, fair_prob in sides
+    )
+
+
+def _flush_snapshots(session: Session, pending: list[dict[str, object]]) -> None:
+    session.execute(insert(OddsSnapshot), pending)
+    pending.clear()
+
+
+def test_consensus_pipeline_h2h_with_best_odds_and_insufficient(monkeypatch, db_session: Session) -> None:
+    use_settings(
+        monkeypatch,
+        sharp_books=("pinnacle", "circa", "betonlineag", "bovada"),
+        consensus_min_books=3,
+        sharp_weight=2.0,
+        standard_weight=1.0,
     )
 
+    snapshots: list[dict[str, object]] = []
+    g1 = _insert_game(db_session, event_id="evt_1")
+    g2 = _insert_game(db_session, event_id="evt_2")
+    t0 = _COMMENCE
+
+    for book, home, away, home_dec, away_dec in [
+        ("pinnacle", 0.62, 0.38, 2.10, 1.95),
+        ("fanduel", 0.50, 0.50, 2.00, 2.05),
+        ("draftkings", 0.50, 0.50, 1.99, 2.08),
+        ("circa", 0.50, 0.50, 2.02, 2.02),
+    ]:
+        _add_book_market(
+            snapshots,
+            game_id=g1.id,
+            captured_at=t0,
+            market_key="h2h",
+            bookmaker=book,
+            sides=[("HOME", home_dec, home), ("AWAY", away_dec, away)],
+        )
+
+    for book in ["fanduel", "betmgm"]:
+        _add_book_market(
+            snapshots,
+            game_id=g2.id,
+            captured_at=t0,
+            market_key="h2h",
+            bookmaker=book,
+            sides=[("HOME", 1.91, 0.50), ("AWAY", 1.91, 0.50)],
+        )
+
+    _flush_snapshots(db_session, snapshots)
+
+    views = build_market_views(get_latest_group_rows(db_session, "basketball_nba", "h2h"))
+    result1 = compute_consensus_for_view(views[("evt_1", "h2h", None)])
+    result2 = compute_consensus_for_view(views[("evt_2", "h2h", None)])
+
+    assert result1.consensus_probs is not None
+    assert sum(result1.consensus_probs.values()) == 1.0
+    assert all(0.0 <= p <= 1.0 for p in result1.consensus_probs.values())
+    assert result1.consensus_probs[Side.HOME] > 0.53
+    assert result1.best_decimal == {Side.HOME: 2.10, Side.AWAY: 2.08}
+    assert result1.best_book == {Side.HOME: "pinnacle", Side.AWAY: "draftkings"}
+    assert result1.captured_at_min == t0.replace(tzinfo=None)
+    assert result1.captured_at_max == t0.replace(tzinfo=None)
+
+    assert result2.consensus_probs is None
+    assert result2.consensus_reason == "insufficient_books"
+    assert result2.included_books == 2
+
+
+def test_latest_complete_group_selected_not_mixed_sides(monkeypatch, db_session: Session) -> None:
+    use_settings(monkeypatch, consensus_min_books=2, sharp_books=())
+
+    snapshots: list[dict[str, object]] = []
+    game = _insert_game(db_session, event_id="evt_3")
+    t1 = _COMMENCE
+    t2 = t1 + _TEN_MIN
+
+    # bookmaker A: t1 complete, t2 incomplete
+    _add_book_market(snapshots, game_id=game.id, captured_at=t1, market_key="h2h", bookmaker="booka", sides=[("HOME", 2.00, 0.60), ("AWAY", 1.90, 0.40)])
+    _add_book_market(snapshots, game_id=game.id, captured_at=t2, market_key="h2h", bookmaker="booka", sides=[("HOME", 2.30, 0.55)])
+
+    # bookmaker B complete at t1
+    _add_book_market(snapshots, game_id=game.id, captured_at=t1, market_key="h2h", bookmaker="bookb", sides=[("HOME", 1.95, 0.50), ("AWAY", 1.95, 0.50)])
+
+    _flush_snapshots(db_session, snapshots)
+
+    views = build_market_views(get_latest_group_rows(db_session, "basketball_nba", "h2h"))
+    result = compute_consensus_for_view(views[("evt_3", "h2h", None)])
+
+    assert result.consensus_probs is None
+    assert result.consensus_reason == "insufficient_books"
+    assert result.included_books == 0
+    assert result.best_decimal == {}
+    assert result.best_book == {}
+    assert result.captured_at_min == t2.replace(tzinfo=None)
+    assert result.captured_at_max == t2.replace(tzinfo=None)
+
+
+def test_missing_side_excludes_bookmaker_group(monkeypatch, db_session: Session) -> None:
+    use_settings(monkeypatch, consensus_min_books=3, sharp_books=("pinnacle",))
+
+    snapshots: list[dict[str, object]] = []
+    game = _insert_game(db_session, event_id="evt_4")
+    t0 = _COMMENCE
+
+    for book in ["pinnacle", "fanduel", "draftkings"]:
+        _add_book_market(snapshots, game_id=game.id, captured_at=t0, market_key="totals", bookmaker=book, point=210.5, sides=[("OVER", 1.95, 0.51), ("UNDER", 1.95, 0.49)])
+
+    _add_book_market(snapshots, game_id=game.id, captured_at=t0, market_key="totals", bookmaker="betmgm", point=210.5, sides=[("OVER", 2.01, 0.55)])
+    _flush_snapshots(db_session, snapshots)
+
+    views = build_market_views(get_latest_group_rows(db_session, "basketball_nba", "totals"))
+    result = compute_consensus_for_view(views[("evt_4", "totals", 210.5)])
+
+    assert result.included_books == 3
+    assert result.consensus_probs is not None
+    assert result.best_decimal[Side.OVER] == 1.95
+
+
+def test_get_latest_group_rows_handles_null_and_non_null_point(monkeypatch, db_session: Session) -> None:
+    use_settings(monkeypatch, consensus_min_books=2)
+
+    snapshots: list[dict[str, object]] = []
+    game = _insert_game(db_session, event_id="evt_5")
+    t0 = _COMMENCE
+
+    for book in ["booka", "bookb"]:
+        _add_book_market(
+            snapshots,
+            game_id=game.id,
+            captured_at=t0,
+            market_key="h2h",
+            bookmaker=book,
+            sides=[("HOME", 2.00, 0.50), ("AWAY", 2.00, 0.50)],
+        )
+        _add_book_market(
+            snapshots,
+            game_id=game.id,
+            captured_at=t0,
+            market_key="totals",
+            bookmaker=book,
+            point=210.5,
+            sides=[("OVER", 1.95, 0.51), ("UNDER", 1.95, 0.49)],
+        )
+
+    _flush_snapshots(db_session, snapshots)
+
+    h2h_rows = get_latest_group_rows(db_session, "basketball_nba", "h2h")
+    totals_rows = get_latest_group_rows(db_session, "basketball_nba", "totals")
 
-def test_consensus_pipeline_h2h_with_best_odds_and_insufficient(monkeypatch) -> None:
-    monkeypatch.setenv("SHARP_BOOKS", "pinnacle,circa,betonlineag,bovada")
-    monkeypatch.setenv("CONSENSUS_MIN_BOOKS", "3")
-    monkeypatch.setenv("SHARP_WEIGHT", "2.0")
-    monkeypatch.setenv("STANDARD_WEIGHT", "1.0")
-
-    from app.config import get_settings
-
-    get_settings.cache_clear()
-
-    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
-    Base.metadata.create_all(engine)
-
-    with Session(engine) as session:
-        g1 = _insert_game(session, event_id="evt_1")
-        g2 = _insert_game(session, event_id="evt_2")
-        t0 = datetime(2025, 1, 1, 0, 0, tzinfo=timezone.utc)
-
-        for book, home, away, home_dec, away_dec in [
-            ("pinnacle", Decimal("0.62"), Decimal("0.38"), Decimal("2.10"), Decimal("1.95")),
-            ("fanduel", Decimal("0.50"), Decimal("0.50"), Decimal("2.00"), Decimal("2.05")),
-            ("draftkings", Decimal("0.50"), Decimal("0.50"), Decimal("1.99"), Decimal("2.08")),
-            ("circa", Decimal("0.50"), Decimal("0.50"), Decimal("2.02"), Decimal("2.02")),
-        ]:
-            _add_snapshot(
-                session,
-                game_id=g1.id,
-                captured_at=t0,
-                market_key="h2h",
-                bookmaker=book,
-                side="HOME",
-                point=None,
-                decimal=home_dec,
-                fair_prob=home,
-            )
-            _add_snapshot(
-                session,
-                game_id=g1.id,
-                captured_at=t0,
-                market_key="h2h",
-                bookmaker=book,
-                side="AWAY",
-                point=None,
-                decimal=away_dec,
-                fair_prob=away,
-            )
-
-        for book in ["fanduel", "betmgm"]:
-            _add_snapshot(
-                session,
-                game_id=g2.id,
-                captured_at=t0,
-                market_key="h2h",
-                bookmaker=book,
-                side="HOME",
-                point=None,
-                decimal=Decimal("1.91"),
-                fair_prob=Decimal("0.50"),
-            )
-            _add_snapshot(
-                session,
-                game_id=g2.id,
-                captured_at=t0,
-                market_key="h2h",
-                bookmaker=book,
-                side="AWAY",
-                point=None,
-                decimal=Decimal("1.91"),
-                fair_prob=Decimal("0.50"),
-            )
-
-        session.commit()
-
-        views = build_market_views(get_latest_group_rows(session, "basketball_nba", "h2h"))
-        result1 = compute_consensus_for_view(views[("evt_1", "h2h", None)])
-        result2 = compute_consensus_for_view(views[("evt_2", "h2h", None)])
-
-        assert result1.consensus_probs is not None
-        assert sum(result1.consensus_probs.values()) == 1.0
-        assert all(0.0 <= p <= 1.0 for p in result1.consensus_probs.values())
-        assert result1.consensus_probs[Side.HOME] > 0.53
-        assert result1.best_decimal[Side.HOME] == 2.10
-        assert result1.best_book[Side.HOME] == "pinnacle"
-        assert result1.best_decimal[Side.AWAY] == 2.08
-        assert result1.best_book[Side.AWAY] == "draftkings"
-        assert result1.captured_at_min == t0.replace(tzinfo=None)
-        assert result1.captured_at_max == t0.replace(tzinfo=None)
-
-        assert result2.consensus_probs is None
-        assert result2.consensus_reason == "insufficient_books"
-        assert result2.included_books == 2
-
-
-def test_latest_complete_group_selected_not_mixed_sides(monkeypatch) -> None:
-    monkeypatch.setenv("CONSENSUS_MIN_BOOKS", "2")
-    monkeypatch.setenv("SHARP_BOOKS", "")
-
-    from app.config import get_settings
-
-    get_settings.cache_clear()
-
-    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
-    Base.metadata.create_all(engine)
-
-    with Session(engine) as session:
-        game = _insert_game(session, event_id="evt_3")
-        t1 = datetime(2025, 1, 1, 0, 0, tzinfo=timezone.utc)
-        t2 = t1 + timedelta(minutes=10)
-
-        # bookmaker A: t1 complete, t2 incomplete
-        _add_snapshot(session, game_id=game.id, captured_at=t1, market_key="h2h", bookmaker="booka", side="HOME", point=None, decimal=Decimal("2.00"), fair_prob=Decimal("0.60"))
-        _add_snapshot(session, game_id=game.id, captured_at=t1, market_key="h2h", bookmaker="booka", side="AWAY", point=None, decimal=Decimal("1.90"), fair_prob=Decimal("0.40"))
-        _add_snapshot(session, game_id=game.id, captured_at=t2, market_key="h2h", bookmaker="booka", side="HOME", point=None, decimal=Decimal("2.30"), fair_prob=Decimal("0.55"))
-
-        # bookmaker B complete at t1
-        _add_snapshot(session, game_id=game.id, captured_at=t1, market_key="h2h", bookmaker="bookb", side="HOME", point=None, decimal=Decimal("1.95"), fair_prob=Decimal("0.50"))
-        _add_snapshot(session, game_id=game.id, captured_at=t1, market_key="h2h", bookmaker="bookb", side="AWAY", point=None, decimal=Decimal("1.95"), fair_prob=Decimal("0.50"))
-
-        session.commit()
-
-        views = build_market_views(get_latest_group_rows(session, "basketball_nba", "h2h"))
-        result = compute_consensus_for_view(views[("evt_3", "h2h", None)])
-
-        assert result.consensus_probs is None
-        assert result.consensus_reason == "insufficient_books"
-        assert result.included_books == 0
-        assert result.best_decimal == {}
-        assert result.best_book == {}
-        assert result.captured_at_min == t2.replace(tzinfo=None)
-        assert result.captured_at_max == t2.replace(tzinfo=None)
-
-
-def test_missing_side_excludes_bookmaker_group(monkeypatch) -> None:
-    monkeypatch.setenv("CONSENSUS_MIN_BOOKS", "3")
-    monkeypatch.setenv("SHARP_BOOKS", "pinnacle")
-
-    from app.config import get_settings
-
-    get_settings.cache_clear()
-
-    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
-    Base.metadata.create_all(engine)
-
-    with Session(engine) as session:
-        game = _insert_game(session, event_id="evt_4")
-        t0 = datetime(2025, 1, 1, 0, 0, tzinfo=timezone.utc)
-
-        for book in ["pinnacle", "fanduel", "draftkings"]:
-            _add_snapshot(session, game_id=game.id, captured_at=t0, market_key="totals", bookmaker=book, side="OVER", point=Decimal("210.5"), decimal=Decimal("1.95"), fair_prob=Decimal("0.51"))
-            _add_snapshot(session, game_id=game.id, captured_at=t0, market_key="totals", bookmaker=book, side="UNDER", point=Decimal("210.5"), decimal=Decimal("1.95"), fair_prob=Decimal("0.49"))
-
-        _add_snapshot(session, game_id=game.id, captured_at=t0, market_key="totals", bookmaker="betmgm", side="OVER", point=Decimal("210.5"), decimal=Decimal("2.01"), fair_prob=Decimal("0.55"))
-        session.commit()
-
-        views = build_market_views(get_latest_group_rows(session, "basketball_nba", "totals"))
-        result = compute_consensus_for_view(views[("evt_4", "totals", 210.5)])
-
-        assert result.included_books == 3
-        assert result.consensus_probs is not None
-        assert result.best_decimal[Side.OVER] == 1.95
-
-
-def test_get_latest_group_rows_handles_null_and_non_null_point(monkeypatch) -> None:
-    monkeypatch.setenv("CONSENSUS_MIN_BOOKS", "2")
-
-    from app.config import get_settings
-
-    get_settings.cache_clear()
-
-    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
-    Base.metadata.create_all(engine)
-
-    with Session(engine) as session:
-        game = _insert_game(session, event_id="evt_5")
-        t0 = datetime(2025, 1, 1, 0, 0, tzinfo=timezone.utc)
-
-        for book in ["booka", "bookb"]:
-            _add_snapshot(
-                session,
-                game_id=game.id,
-                captured_at=t0,
-                market_key="h2h",
-                bookmaker=book,
-                side="HOME",
-                point=None,
-                decimal=Decimal("2.00"),
-                fair_prob=Decimal("0.50"),
-            )
-            _add_snapshot(
-                session,
-                game_id=game.id,
-                captured_at=t0,
-                market_key="h2h",
-                bookmaker=book,
-                side="AWAY",
-                point=None,
-                decimal=Decimal("2.00"),
-                fair_prob=Decimal("0.50"),
-            )
-            _add_snapshot(
-                session,
-                game_id=game.id,
-                captured_at=t0,
-                market_key="totals",
-                bookmaker=book,
-                side="OVER",
-                point=Decimal("210.5"),
-                decimal=Decimal("1.95"),
-                fair_prob=Decimal("0.51"),
-            )
-            _add_snapshot(
-                session,
-                game_id=game.id,
-                captured_at=t0,
-                market_key="totals",
-                bookmaker=book,
-                side="UNDER",
-                point=Decimal("210.5"),
-                decimal=Decimal("1.95"),
-                fair_prob=Decimal("0.49"),
-            )
-
-        session.commit()
-
-        h2h_rows = get_latest_group_rows(session, "basketball_nba", "h2h")
-        totals_rows = get_latest_group_rows(session, "basketball_nba", "totals")
-
-        assert h2h_rows
-        assert totals_rows
-        assert any(row.point is None for row in h2h_rows)
-        assert all(row.point is not None for row in totals_rows)
+    assert h2h_rows
+    assert totals_rows
+    assert any(row.point is None for row in h2h_rows)
+    assert all(row.point is not None for row in totals_rows)
 
 
 def test_latest_group_rows_stmt_reuses_single_point_sentinel_bindparam() -> None:
-    stmt = _build_latest_group_rows_stmt(sport_key="basketball_nba", market_key="h2h")
+    stmt = _build_latest_group_rows_stmt()
     compiled = stmt.compile(dialect=postgresql.dialect())
     sql = str(compiled)
 
@@ -1,14 +1,16 @@
 from __future__ import annotations
 
+import itertools
 from datetime import datetime, timezone
 from decimal import Decimal
 
-from sqlalchemy import create_engine
 from sqlalchemy.orm import Session
 
 from app.api.dashboard import dashboard
 from app.api.picks import recommended_picks
-from app.models import Base, Game, Pick, PickScore
+from app.models import Game, Pick, PickScore
+
+_pick_ids = itertools.count(1)
 
 
 def _seed_db(session: Session) -> None:
@@ -22,6 +24,7 @@ def _seed_db(session: Session) -> None:
     session.add(game)
     session.flush()
     pick = Pick(
+        id=next(_pick_ids),
         game_id=game.id,
         market_key="h2h",
         side="HOME",
@@ -39,7 +42,6 @@ def _seed_db(session: Session) -> None:
         captured_at_max=datetime(2029, 12, 31, 22, 5, tzinfo=timezone.utc),
     )
     session.add(pick)
-    session.flush()
     session.add(
         PickScore(
             pick_id=pick.id,
@@ -65,16 +67,12 @@ def test_dashboard_returns_html() -> None:
     response = dashboard()
 
     assert response.status_code == 200
-    assert "Recommended Picks" in response.body.decode("utf-8")
-
+    assert b"Recommended Picks" in response.body
 
-def test_recommended_picks_shape() -> None:
-    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
-    Base.metadata.create_all(engine)
 
-    with Session(engine) as session:
-        _seed_db(session)
-        data = recommended_picks(sport_key=None, market_key=None, limit=20, db=session)
+def test_recommended_picks_shape(db_session: Session) -> None:
+    _seed_db(db_session)
+    data = recommended_picks(sport_key=None, market_key=None, limit=20, db=db_session)
 
     assert isinstance(data, list)
     expected = {
@@ -1,4 +1,17 @@
-from app.services.ingest import build_normalized_group_representation
+from functools import lru_cache
+
+from app.services.ingest import build_normalized_group_representation, compute_group_hash
+
+
+def _freeze(side_prices: list[dict]) -> tuple[tuple[tuple[str, object], ...], ...]:
+    return tuple(tuple(sorted(price.items())) for price in side_prices)
+
+
+@lru_cache(maxsize=64)
+def _golden_hash(event_id: str, market_key: str, bookmaker: str, point: float | None, frozen_sides: tuple) -> str:
+    # Reference hashes are memoized; the input under test is always hashed fresh.
+    side_prices = [dict(items) for items in frozen_sides]
+    return build_normalized_group_representation(event_id, market_key, bookmaker, point, side_prices)[1]
 
 
 def test_group_hash_stability_same_input_same_hash() -> None:
@@ -6,9 +19,11 @@ def test_group_hash_stability_same_input_same_hash() -> None:
         {"side": "AWAY", "american": -110, "decimal": 1.9090909},
         {"side": "HOME", "american": -110, "decimal": 1.9090909},
     ]
+    expected = _golden_hash("event1", "h2h", "draftkings", None, _freeze(side_prices))
     _, hash_one = build_normalized_group_representation("event1", "h2h", "draftkings", None, side_prices)
     _, hash_two = build_normalized_group_representation("event1", "h2h", "draftkings", None, list(reversed(side_prices)))
-    assert hash_one == hash_two
+    assert hash_one == expected
+    assert hash_two == expected
 
 
 def test_group_hash_changes_when_price_changes() -> None:
@@ -20,6 +35,15 @@ def test_group_hash_changes_when_price_changes() -> None:
         {"side": "HOME", "american": -115, "decimal": 1.8695652},
         {"side": "AWAY", "american": -105, "decimal": 1.9523810},
     ]
-    _, hash_one = build_normalized_group_representation("event1", "h2h", "draftkings", None, original)
-    _, hash_two = build_normalized_group_representation("event1", "h2h", "draftkings", None, changed)
-    assert hash_one != hash_two
+    expected = _golden_hash("event1", "h2h", "draftkings", None, _freeze(original))
+    _, changed_hash = build_normalized_group_representation("event1", "h2h", "draftkings", None, changed)
+    assert changed_hash != expected
+
+
+def test_compute_group_hash_matches_representation_hash() -> None:
+    side_prices = [
+        {"side": "OVER", "american": -115, "decimal": 1.8695652},
+        {"side": "UNDER", "american": -105, "decimal": 1.9523810},
+    ]
+    expected = _golden_hash("event1", "totals", "fanduel", 210.5, _freeze(side_prices))
+    assert compute_group_hash("event1", "totals", "fanduel", 210.5, list(reversed(side_prices))) == expected
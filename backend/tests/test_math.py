@@ -1,13 +1,17 @@
 import math
+from decimal import Decimal
 
 import pytest
 
 from app.core.math import (
+    PLACES_4,
     american_to_decimal,
+    american_to_decimal_and_implied_prob,
     american_to_implied_prob,
     book_clv,
     consensus_fair_prob,
     decimal_to_american,
+    ev_and_kelly_fraction,
     ev_percent,
     kelly_fraction,
     market_clv,
@@ -15,6 +19,7 @@ from app.core.math import (
     parlay_ev,
     parlay_prob,
     remove_vig,
+    to_decimal,
 )
 from app.domain.enums import MarketKey, Side
 from app.domain.types import Leg
@@ -33,9 +38,19 @@ def test_american_to_implied_prob_known_values() -> None:
     assert american_to_implied_prob(150) == pytest.approx(100 / 250)
 
 
+def test_american_to_decimal_and_implied_prob_matches_scalar_conversions() -> None:
+    for american in [100, 102, 150, 250, -100, -105, -110, -150, -200, -1000]:
+        assert american_to_decimal_and_implied_prob(american) == (
+            american_to_decimal(american),
+            american_to_implied_prob(american),
+        )
+    with pytest.raises(ValueError):
+        american_to_decimal_and_implied_prob(-99)
+
+
 def test_remove_vig_sums_to_one() -> None:
     devigged = remove_vig([0.54, 0.52])
-    assert sum(devigged) == pytest.approx(1.0)
+    assert abs(math.fsum(devigged) - 1.0) < 1e-9
     assert devigged[0] == pytest.approx(0.54 / 1.06)
 
 
@@ -47,7 +62,7 @@ def test_consensus_fair_prob_weighted_and_normalized() -> None:
         ],
         weights=[2.0, 1.0],
     )
-    assert sum(result.values()) == pytest.approx(1.0)
+    assert abs(math.fsum(result.values()) - 1.0) < 1e-9
     assert result[Side.HOME] > result[Side.AWAY]
 
 
@@ -68,36 +83,50 @@ def test_kelly_fraction_behavior() -> None:
     assert kelly_fraction(fair_prob, odds, max_cap=0.01) == pytest.approx(0.01)
 
 
-def _legs() -> list[Leg]:
-    return [
-        Leg(
-            event_id="1",
-            market_key=MarketKey.H2H,
-            side=Side.HOME,
-            decimal_odds=1.91,
-            fair_prob=0.55,
-        ),
-        Leg(
-            event_id="2",
-            market_key=MarketKey.TOTALS,
-            side=Side.OVER,
-            point=45.5,
-            decimal_odds=1.87,
-            fair_prob=0.52,
-        ),
-        Leg(
-            event_id="3",
-            market_key=MarketKey.SPREADS,
-            side=Side.AWAY,
-            point=3.5,
-            decimal_odds=2.05,
-            fair_prob=0.48,
-        ),
-    ]
+def test_ev_and_kelly_fraction_matches_separate_calls() -> None:
+    for fair_prob, odds in [(0.53, 2.10), (0.40, 2.0), (0.60, 1.75)]:
+        ev, kelly = ev_and_kelly_fraction(fair_prob, odds, kelly_multiplier=0.25, max_cap=0.05)
+        assert ev == ev_percent(fair_prob, odds)
+        assert kelly == kelly_fraction(fair_prob, odds, kelly_multiplier=0.25, max_cap=0.05)
+
+    with pytest.raises(ValueError):
+        ev_and_kelly_fraction(0.5, 1.0)
+
+
+def test_to_decimal_rounds_half_boundaries_from_the_printed_value() -> None:
+    assert to_decimal(2.675, Decimal("0.01")) == Decimal("2.68")
+    assert to_decimal(0.12345, PLACES_4) == Decimal("0.1234")
+
+
+_LEGS: tuple[Leg, ...] = (
+    Leg(
+        event_id="1",
+        market_key=MarketKey.H2H,
+        side=Side.HOME,
+        decimal_odds=1.91,
+        fair_prob=0.55,
+    ),
+    Leg(
+        event_id="2",
+        market_key=MarketKey.TOTALS,
+        side=Side.OVER,
+        point=45.5,
+        decimal_odds=1.87,
+        fair_prob=0.52,
+    ),
+    Leg(
+        event_id="3",
+        market_key=MarketKey.SPREADS,
+        side=Side.AWAY,
+        point=3.5,
+        decimal_odds=2.05,
+        fair_prob=0.48,
+    ),
+)
 
 
 def test_parlay_math_two_and_three_legs_matches_manual() -> None:
-    legs = _legs()
+    legs = _LEGS
     two_leg_manual_odds = legs[0].decimal_odds * legs[1].decimal_odds
     two_leg_manual_prob = legs[0].fair_prob * legs[1].fair_prob
     assert parlay_decimal_odds(legs[:2]) == pytest.approx(two_leg_manual_odds)
@@ -125,6 +154,10 @@ def test_validation_failures() -> None:
         decimal_to_american(1.0)
     with pytest.raises(ValueError):
         remove_vig([])
+    with pytest.raises(ValueError, match="finite"):
+        remove_vig([0.5, float("nan")])
+    with pytest.raises(ValueError, match="between 0 and 1"):
+        remove_vig([0.5, 1.2])
     with pytest.raises(ValueError):
         consensus_fair_prob([], [])
     with pytest.raises(ValueError):
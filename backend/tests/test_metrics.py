@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import itertools
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.models import Game, Pick, PickScore
+from app.services.metrics import compute_clv_health
+
+_pick_ids = itertools.count(1)
+
+
+def _insert_game(session: Session, *, event_id: str, sport_key: str) -> Game:
+    game = Game(
+        sport_key=sport_key,
+        event_id=event_id,
+        commence_time=datetime.now(timezone.utc) + timedelta(days=1),
+        home_team="home",
+        away_team="away",
+    )
+    session.add(game)
+    session.flush()
+    return game
+
+
+def _insert_pick(
+    session: Session,
+    *,
+    game_id: int,
+    side: str,
+    market_clv: Decimal | None,
+    book_clv: Decimal | None = None,
+) -> Pick:
+    now = datetime.now(timezone.utc)
+    pick = Pick(
+        id=next(_pick_ids),
+        game_id=game_id,
+        market_key="h2h",
+        side=side,
+        point=None,
+        source="CONSENSUS",
+        consensus_prob=Decimal("0.55"),
+        best_decimal=Decimal("2.05"),
+        best_book="booka",
+        ev=Decimal("0.06"),
+        kelly_fraction=Decimal("0.01"),
+        stake=Decimal("10.00"),
+        consensus_books=3,
+        sharp_books=1,
+        captured_at_min=now,
+        captured_at_max=now,
+        market_clv=market_clv,
+        book_clv=book_clv,
+        clv_computed_at=now if market_clv is not None else None,
+    )
+    session.add(pick)
+    return pick
+
+
+def test_compute_clv_health_buckets_by_sport(db_session: Session) -> None:
+    nba = _insert_game(db_session, event_id="evt_nba", sport_key="basketball_nba")
+    nfl = _insert_game(db_session, event_id="evt_nfl", sport_key="americanfootball_nfl")
+    _insert_pick(db_session, game_id=nba.id, side="HOME", market_clv=Decimal("0.02"), book_clv=Decimal("0.01"))
+    _insert_pick(db_session, game_id=nba.id, side="AWAY", market_clv=Decimal("-0.01"), book_clv=Decimal("0.03"))
+    _insert_pick(db_session, game_id=nfl.id, side="HOME", market_clv=Decimal("0.04"))
+    nfl_pending = _insert_pick(db_session, game_id=nfl.id, side="AWAY", market_clv=None)
+    db_session.add(
+        PickScore(
+            pick_id=nfl_pending.id,
+            scored_at=datetime.now(timezone.utc),
+            version="pqs_v1",
+            pqs=Decimal("0.60"),
+            components_json={},
+            features_json={},
+            decision="KEEP",
+            drop_reason=None,
+        )
+    )
+    db_session.commit()
+
+    health = compute_clv_health(db_session, days=7)
+
+    assert health["total_picks"] == 4
+    assert health["clv_computed_count"] == 3
+    assert health["median_market_clv"] == pytest.approx(0.02)
+    assert health["mean_market_clv"] == pytest.approx(0.05 / 3)
+    assert health["pct_positive_market_clv"] == pytest.approx(2 / 3)
+    assert health["median_book_clv"] == pytest.approx(0.02)
+    assert health["keep_rate"] == 1.0
+    assert health["avg_pqs"] == pytest.approx(0.60)
+
+    assert sorted(health["by_sport"]) == ["americanfootball_nfl", "basketball_nba"]
+    nba_bucket = health["by_sport"]["basketball_nba"]
+    assert nba_bucket["total_picks"] == 2
+    assert nba_bucket["median_market_clv"] == pytest.approx(0.005)
+    nfl_bucket = health["by_sport"]["americanfootball_nfl"]
+    assert nfl_bucket["clv_coverage_rate"] == 0.5
+    assert nfl_bucket["median_book_clv"] is None
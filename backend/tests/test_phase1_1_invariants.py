@@ -5,16 +5,17 @@ import pytest
 import sys
 from types import SimpleNamespace
 
-from sqlalchemy import create_engine
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.domain.enums import Side
-from app.models import Base, Game, OddsGroup, OddsSnapshot
+from app.models import Game, OddsGroup, OddsSnapshot
 from app.services.ingest import (
     build_normalized_group_representation,
     ingest_odds_for_sport,
     parse_commence_time_to_utc,
 )
+from tests._settings import use_settings
 
 
 def test_side_enum_values_are_canonical_uppercase() -> None:
@@ -27,6 +28,10 @@ def test_parse_commence_time_normalizes_to_utc_aware() -> None:
     assert parsed.tzinfo == timezone.utc
     assert parsed.isoformat() == "2025-01-04T00:30:00+00:00"
 
+    parsed_z = parse_commence_time_to_utc("2025-01-04T00:30:00Z")
+    assert parsed_z == parsed
+    assert parsed_z.tzinfo == timezone.utc
+
 
 def test_group_hash_ignores_derived_fields_but_changes_on_price_or_point() -> None:
     baseline = [
@@ -93,76 +98,69 @@ def test_group_hash_stable_with_different_side_ordering() -> None:
     assert hash_one == hash_two
 
 
-def test_identical_payload_second_ingest_has_zero_changes(monkeypatch) -> None:
-    payload = [
-        {
-            "id": "evt_1",
-            "sport_key": "basketball_nba",
-            "commence_time": "2025-01-04T00:30:00Z",
-            "home_team": "Boston Celtics",
-            "away_team": "Miami Heat",
-            "bookmakers": [
-                {
-                    "key": "fanduel",
-                    "markets": [
-                        {
-                            "key": "h2h",
-                            "outcomes": [
-                                {"name": "Miami Heat", "price": 102},
-                                {"name": "Boston Celtics", "price": -120},
-                            ],
-                        }
-                    ],
-                },
-                {
-                    "key": "draftkings",
-                    "markets": [
-                        {
-                            "key": "totals",
-                            "outcomes": [
-                                {"name": "Under", "price": -105, "point": 210.5},
-                                {"name": "Over", "price": -115, "point": 210.5},
-                            ],
-                        }
-                    ],
-                },
-            ],
-        }
-    ]
-
-    monkeypatch.setenv("ODDS_SPORTS_WHITELIST", "basketball_nba")
-    monkeypatch.setenv("ODDS_MARKETS", "h2h,totals")
-
-    from app.config import get_settings
-
-    get_settings.cache_clear()
-
-    def fake_fetch_odds(*, sport_key, markets, regions, odds_format):
-        assert sport_key == "basketball_nba"
-        assert set(markets) == {"h2h", "totals"}
-        return payload, {"headers": {}, "fetched_at": "2025-01-04T00:00:00Z"}
-
-    monkeypatch.setitem(sys.modules, "app.integrations.odds_api", SimpleNamespace(fetch_odds=fake_fetch_odds))
+_PAYLOAD = [
+    {
+        "id": "evt_1",
+        "sport_key": "basketball_nba",
+        "commence_time": "2025-01-04T00:30:00Z",
+        "home_team": "Boston Celtics",
+        "away_team": "Miami Heat",
+        "bookmakers": [
+            {
+                "key": "fanduel",
+                "markets": [
+                    {
+                        "key": "h2h",
+                        "outcomes": [
+                            {"name": "Miami Heat", "price": 102},
+                            {"name": "Boston Celtics", "price": -120},
+                        ],
+                    }
+                ],
+            },
+            {
+                "key": "draftkings",
+                "markets": [
+                    {
+                        "key": "totals",
+                        "outcomes": [
+                            {"name": "Under", "price": -105, "point": 210.5},
+                            {"name": "Over", "price": -115, "point": 210.5},
+                        ],
+                    }
+                ],
+            },
+        ],
+    }
+]
+
+
+def _fake_fetch_odds(*, sport_key, markets, regions, odds_format):
+    assert sport_key == "basketball_nba"
+    assert set(markets) == {"h2h", "totals"}
+    return _PAYLOAD, {"headers": {}, "fetched_at": "2025-01-04T00:00:00Z"}
+
+
+def test_identical_payload_second_ingest_has_zero_changes(monkeypatch, db_session: Session) -> None:
+    use_settings(monkeypatch, odds_sports_whitelist=("basketball_nba",), odds_markets=("h2h", "totals"))
+
+    monkeypatch.setitem(sys.modules, "app.integrations.odds_api", SimpleNamespace(fetch_odds=_fake_fetch_odds))
     monkeypatch.setattr("app.services.ingest.record_quota", lambda *_args, **_kwargs: None)
 
-    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
-    Base.metadata.create_all(engine)
-
-    with Session(engine) as session:
-        first_summary = ingest_odds_for_sport(session=session, sport_key="basketball_nba")
-        second_summary = ingest_odds_for_sport(session=session, sport_key="basketball_nba")
+    first_summary = ingest_odds_for_sport(session=db_session, sport_key="basketball_nba")
+    second_summary = ingest_odds_for_sport(session=db_session, sport_key="basketball_nba")
 
-        assert first_summary["groups_changed"] == 2
-        assert first_summary["snapshot_rows_inserted"] == 4
-        assert second_summary["groups_changed"] == 0
-        assert second_summary["snapshot_rows_inserted"] == 0
-        assert second_summary["groups_skipped"] == 2
+    assert first_summary["groups_changed"] == 2
+    assert first_summary["snapshot_rows_inserted"] == 4
+    assert second_summary["groups_changed"] == 0
+    assert second_summary["snapshot_rows_inserted"] == 0
+    assert second_summary["groups_skipped"] == 2
 
-        game = session.query(Game).filter_by(event_id="evt_1").one()
-        assert game is not None
+    game = db_session.execute(select(Game).where(Game.event_id == "evt_1")).scalar_one()
+    assert game is not None
 
 
-def test_spreads_pairing_by_absolute_point_devigs_to_one(monkeypatch) -> None:
+def test_spreads_pairing_by_absolute_point_devigs_to_one(monkeypatch, db_session: Session) -> None:
     payload = [
         {
             "id": "evt_spread_1",
@@ -187,12 +185,7 @@ def test_spreads_pairing_by_absolute_point_devigs_to_one(monkeypatch) -> None:
         }
     ]
 
-    monkeypatch.setenv("ODDS_SPORTS_WHITELIST", "basketball_nba")
-    monkeypatch.setenv("ODDS_MARKETS", "spreads")
-
-    from app.config import get_settings
-
-    get_settings.cache_clear()
+    use_settings(monkeypatch, odds_sports_whitelist=("basketball_nba",), odds_markets=("spreads",))
 
     def fake_fetch_odds(*, sport_key, markets, regions, odds_format):
         assert sport_key == "basketball_nba"
@@ -202,20 +195,82 @@ def test_spreads_pairing_by_absolute_point_devigs_to_one(monkeypatch) -> None:
     monkeypatch.setitem(sys.modules, "app.integrations.odds_api", SimpleNamespace(fetch_odds=fake_fetch_odds))
     monkeypatch.setattr("app.services.ingest.record_quota", lambda *_args, **_kwargs: None)
 
-    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
-    Base.metadata.create_all(engine)
+    summary = ingest_odds_for_sport(session=db_session, sport_key="basketball_nba")
+    assert summary["groups_changed"] == 1
+    assert summary["snapshot_rows_inserted"] == 2
+
+    rows = db_session.execute(select(OddsSnapshot)).scalars().all()
+    assert len(rows) == 2
+    fair_probs = sorted(float(row.fair_prob) for row in rows)
+    assert sum(fair_probs) == pytest.approx(1.0)
+    assert fair_probs[0] == pytest.approx(0.5)
+    assert fair_probs[1] == pytest.approx(0.5)
+
+
+def _two_way_event(event_id: str, market_key: str, *, home_team: str | None = "Boston Celtics") -> dict:
+    home_point, away_point = (-4.5, 4.5) if market_key == "spreads" else (None, None)
+    return {
+        "id": event_id,
+        "sport_key": "basketball_nba",
+        "commence_time": "2025-01-04T00:30:00Z",
+        "home_team": home_team,
+        "away_team": "Miami Heat",
+        "bookmakers": [
+            {
+                "key": "fanduel",
+                "markets": [
+                    {
+                        "key": market_key,
+                        "outcomes": [
+                            {"name": "Boston Celtics", "price": -110, "point": home_point},
+                            {"name": "Miami Heat", "price": -110, "point": away_point},
+                        ],
+                    }
+                ],
+            }
+        ],
+    }
+
+
+def _install_payload(monkeypatch, payload: list[dict], market_key: str, *, delta_hash_strict: bool = True) -> None:
+    use_settings(
+        monkeypatch,
+        odds_sports_whitelist=("basketball_nba",),
+        odds_markets=(market_key,),
+        delta_hash_strict=delta_hash_strict,
+    )
+
+    def fake_fetch_odds(*, sport_key, markets, regions, odds_format):
+        return payload, {"headers": {}, "fetched_at": "2025-01-04T00:00:00Z"}
+
+    monkeypatch.setitem(sys.modules, "app.integrations.odds_api", SimpleNamespace(fetch_odds=fake_fetch_odds))
+    monkeypatch.setattr("app.services.ingest.record_quota", lambda *_args, **_kwargs: None)
+
+
+@pytest.mark.parametrize("market_key", ["h2h", "spreads"])
+def test_repeated_event_in_one_payload_writes_one_group(monkeypatch, db_session: Session, market_key: str) -> None:
+    event = _two_way_event("evt_repeat", market_key)
+    _install_payload(monkeypatch, [event, event], market_key)
+
+    summary = ingest_odds_for_sport(session=db_session, sport_key="basketball_nba")
+
+    assert summary["groups_changed"] == 1
+    assert summary["groups_skipped"] == 1
+    assert summary["snapshot_rows_inserted"] == 2
+    assert len(db_session.execute(select(OddsGroup)).scalars().all()) == 1
+
+
+def test_bad_game_row_is_isolated_when_not_strict(monkeypatch, db_session: Session) -> None:
+    payload = [_two_way_event("evt_good", "h2h"), _two_way_event("evt_bad", "h2h", home_team=None)]
+    _install_payload(monkeypatch, payload, "h2h", delta_hash_strict=False)
 
-    with Session(engine) as session:
-        summary = ingest_odds_for_sport(session=session, sport_key="basketball_nba")
-        assert summary["groups_changed"] == 1
-        assert summary["snapshot_rows_inserted"] == 2
+    summary = ingest_odds_for_sport(session=db_session, sport_key="basketball_nba")
 
-        rows = session.query(OddsSnapshot).all()
-        assert len(rows) == 2
-        fair_probs = sorted(float(row.fair_prob) for row in rows)
-        assert sum(fair_probs) == pytest.approx(1.0)
-        assert fair_probs[0] == pytest.approx(0.5)
-        assert fair_probs[1] == pytest.approx(0.5)
+    assert summary["games_upserted"] == 1
+    assert summary["errors_count"] == 1
+    assert summary["groups_changed"] == 1
+    event_ids = db_session.execute(select(Game.event_id)).scalars().all()
+    assert event_ids == ["evt_good"]
 
 
 def test_datetime_columns_are_timezone_aware() -> None:
@@ -1,33 +1,31 @@
 from __future__ import annotations
 
+import itertools
 from datetime import datetime, timezone
 from decimal import Decimal
+from functools import lru_cache
 
-from sqlalchemy import create_engine
+from sqlalchemy import func, insert, select
 from sqlalchemy.orm import Session
 
-from app.config import get_settings
 from app.core.math import ev_percent, kelly_fraction
 from app.domain.enums import Side
-from app.models import Base, Game, OddsSnapshot, Pick
-from app.services.picks import generate_consensus_picks
+from app.models import OddsSnapshot, Pick, PickScore
+from app.services.picks import generate_consensus_picks, list_picks
+from tests._factories import insert_game
+from tests._settings import use_settings
 
+_COMMENCE = datetime(2030, 1, 1, 0, 0, tzinfo=timezone.utc)
+# Snapshot columns shared by every seeded row.
+_BASE_SNAP: dict[str, object] = {"market_key": "h2h", "point": None, "american": -110, "implied_prob": Decimal("0.50")}
+# Snapshot prices repeat across books, so each string is parsed only once.
+_dec = lru_cache(maxsize=64)(Decimal)
 
-def _insert_game(session: Session, *, event_id: str) -> Game:
-    game = Game(
-        sport_key="basketball_nba",
-        event_id=event_id,
-        commence_time=datetime(2030, 1, 1, 0, 0, tzinfo=timezone.utc),
-        home_team="home",
-        away_team="away",
-    )
-    session.add(game)
-    session.flush()
-    return game
+# Client-side Pick ids so PickScore rows can reference them without a flush.
+_pick_ids = itertools.count(1)
 
 
-def _add_snapshot(
-    session: Session,
+def _snapshot_row(
     *,
     game_id: int,
     bookmaker: str,
@@ -35,103 +33,147 @@ def _add_snapshot(
     fair_prob: str,
     decimal: str,
     captured_at: datetime,
-) -> None:
-    session.add(
-        OddsSnapshot(
-            game_id=game_id,
-            captured_at=captured_at,
+) -> dict[str, object]:
+    return {
+        **_BASE_SNAP,
+        "game_id": game_id,
+        "captured_at": captured_at,
+        "bookmaker": bookmaker,
+        "side": side,
+        "decimal": _dec(decimal),
+        "fair_prob": _dec(fair_prob),
+        "group_hash": f"{bookmaker}-{captured_at.isoformat()}-{side}",
+    }
+
+
+def test_generate_picks_ev_kelly_idempotent_and_min_books(monkeypatch, db_session: Session) -> None:
+    use_settings(
+        monkeypatch,
+        consensus_min_books=3,
+        pick_min_books=3,
+        pick_min_ev=0.015,
+        bankroll_paper=10000.0,
+        kelly_multiplier=0.25,
+        kelly_max_cap=0.05,
+        kelly_cap=0.05,
+        sharp_books=(),
+        min_books=3,
+        sharp_book_min=0,
+    )
+
+    t0 = datetime(2025, 1, 1, 0, 0, tzinfo=timezone.utc)
+    g1 = insert_game(db_session, commence_time=_COMMENCE, event_id="evt_good")
+    g2 = insert_game(db_session, commence_time=_COMMENCE, event_id="evt_low_ev")
+    g3 = insert_game(db_session, commence_time=_COMMENCE, event_id="evt_few_books")
+
+    rows: list[dict[str, object]] = []
+
+    # g1: HOME should pass threshold, AWAY should fail threshold.
+    for book, home_dec, away_dec in [
+        ("pinnacle", "2.10", "2.02"),
+        ("fanduel", "2.00", "2.00"),
+        ("draftkings", "2.02", "1.98"),
+    ]:
+        rows.append(_snapshot_row(game_id=g1.id, bookmaker=book, side="HOME", fair_prob="0.53", decimal=home_dec, captured_at=t0))
+        rows.append(_snapshot_row(game_id=g1.id, bookmaker=book, side="AWAY", fair_prob="0.47", decimal=away_dec, captured_at=t0))
+
+    # g2: both sides too low EV.
+    for book in ["booka", "bookb", "bookc"]:
+        rows.append(_snapshot_row(game_id=g2.id, bookmaker=book, side="HOME", fair_prob="0.50", decimal="1.98", captured_at=t0))
+        rows.append(_snapshot_row(game_id=g2.id, bookmaker=book, side="AWAY", fair_prob="0.50", decimal="1.98", captured_at=t0))
+
+    # g3: insufficient books for picks generation.
+    for book in ["bookx", "booky"]:
+        rows.append(_snapshot_row(game_id=g3.id, bookmaker=book, side="HOME", fair_prob="0.60", decimal="2.30", captured_at=t0))
+        rows.append(_snapshot_row(game_id=g3.id, bookmaker=book, side="AWAY", fair_prob="0.40", decimal="2.10", captured_at=t0))
+
+    db_session.execute(insert(OddsSnapshot), rows)
+    db_session.commit()
+
+    summary1 = generate_consensus_picks(db_session, sport_key="basketball_nba", market_key="h2h")
+    picks = db_session.execute(select(Pick).order_by(Pick.id)).scalars().all()
+
+    assert summary1["total_views"] == 3
+    assert summary1["inserted"] <= 1
+    assert summary1["skipped_low_ev"] == 3
+    assert summary1["skipped_insufficient_books"] == 1
+
+    pick = picks[0]
+    assert pick.side in {side.value for side in Side}
+    assert pick.side == Side.HOME.value
+    assert pick.source == "CONSENSUS"
+
+    expected_ev = ev_percent(0.53, 2.10)
+    expected_kelly = kelly_fraction(0.53, 2.10, kelly_multiplier=0.25, max_cap=0.05)
+
+    assert float(pick.ev) == round(expected_ev, 8)
+    assert float(pick.kelly_fraction) == round(expected_kelly, 8)
+    assert float(pick.stake) == round(10000.0 * expected_kelly, 4)
+
+    # Idempotent: same snapshots should not insert duplicate records.
+    summary2 = generate_consensus_picks(db_session, sport_key="basketball_nba", market_key="h2h")
+    assert summary2["inserted"] == 0
+    assert summary2["skipped_existing"] == 1
+    assert db_session.execute(select(func.count()).select_from(Pick)).scalar_one() == 1
+
+
+def test_generate_picks_no_views_returns_empty_summary(monkeypatch, db_session: Session) -> None:
+    use_settings(monkeypatch, pick_min_books=3)
+
+    summary = generate_consensus_picks(db_session, sport_key="basketball_nba", market_key="h2h")
+    assert summary["total_views"] == 0
+    assert summary["inserted"] == 0
+    assert summary["candidates"] == 0
+
+
+def test_list_picks_returns_float_columns_for_kept_picks(monkeypatch, db_session: Session) -> None:
+    settings = use_settings(monkeypatch)
+
+    game = insert_game(db_session, commence_time=_COMMENCE, event_id="evt_list")
+    now = datetime(2025, 1, 1, 0, 0, tzinfo=timezone.utc)
+    for side, decision in [("HOME", "KEEP"), ("AWAY", "DROP")]:
+        pick = Pick(
+            id=next(_pick_ids),
+            game_id=game.id,
             market_key="h2h",
-            bookmaker=bookmaker,
             side=side,
             point=None,
-            american=-110,
-            decimal=Decimal(decimal),
-            implied_prob=Decimal("0.50"),
-            fair_prob=Decimal(fair_prob),
-            group_hash=f"{bookmaker}-{captured_at.isoformat()}-{side}",
+            source="CONSENSUS",
+            consensus_prob=Decimal("0.55"),
+            best_decimal=Decimal("2.05"),
+            best_book="booka",
+            ev=Decimal("0.06"),
+            kelly_fraction=Decimal("0.01"),
+            stake=Decimal("10.00"),
+            consensus_books=3,
+            sharp_books=1,
+            captured_at_min=now,
+            captured_at_max=now,
         )
-    )
-
-
-def test_generate_picks_ev_kelly_idempotent_and_min_books(monkeypatch) -> None:
-    monkeypatch.setenv("CONSENSUS_MIN_BOOKS", "3")
-    monkeypatch.setenv("PICK_MIN_BOOKS", "3")
-    monkeypatch.setenv("PICK_MIN_EV", "0.015")
-    monkeypatch.setenv("BANKROLL_PAPER", "10000")
-    monkeypatch.setenv("KELLY_MULTIPLIER", "0.25")
-    monkeypatch.setenv("KELLY_MAX_CAP", "0.05")
-    monkeypatch.setenv("KELLY_CAP", "0.05")
-    monkeypatch.setenv("SHARP_BOOKS", "")
-    monkeypatch.setenv("MIN_BOOKS", "3")
-    monkeypatch.setenv("SHARP_BOOK_MIN", "0")
-    get_settings.cache_clear()
-
-    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
-    Base.metadata.create_all(engine)
-
-    with Session(engine) as session:
-        t0 = datetime(2025, 1, 1, 0, 0, tzinfo=timezone.utc)
-        g1 = _insert_game(session, event_id="evt_good")
-        g2 = _insert_game(session, event_id="evt_low_ev")
-        g3 = _insert_game(session, event_id="evt_few_books")
-
-        # g1: HOME should pass threshold, AWAY should fail threshold.
-        for book, home_dec, away_dec in [
-            ("pinnacle", "2.10", "2.02"),
-            ("fanduel", "2.00", "2.00"),
-            ("draftkings", "2.02", "1.98"),
-        ]:
-            _add_snapshot(session, game_id=g1.id, bookmaker=book, side="HOME", fair_prob="0.53", decimal=home_dec, captured_at=t0)
-            _add_snapshot(session, game_id=g1.id, bookmaker=book, side="AWAY", fair_prob="0.47", decimal=away_dec, captured_at=t0)
-
-        # g2: both sides too low EV.
-        for book in ["booka", "bookb", "bookc"]:
-            _add_snapshot(session, game_id=g2.id, bookmaker=book, side="HOME", fair_prob="0.50", decimal="1.98", captured_at=t0)
-            _add_snapshot(session, game_id=g2.id, bookmaker=book, side="AWAY", fair_prob="0.50", decimal="1.98", captured_at=t0)
-
-        # g3: insufficient books for picks generation.
-        for book in ["bookx", "booky"]:
-            _add_snapshot(session, game_id=g3.id, bookmaker=book, side="HOME", fair_prob="0.60", decimal="2.30", captured_at=t0)
-            _add_snapshot(session, game_id=g3.id, bookmaker=book, side="AWAY", fair_prob="0.40", decimal="2.10", captured_at=t0)
-
-        session.commit()
-
-        summary1 = generate_consensus_picks(session, sport_key="basketball_nba", market_key="h2h")
-        picks = session.query(Pick).order_by(Pick.id.asc()).all()
-
-        assert summary1["total_views"] == 3
-        assert summary1["inserted"] <= 1
-        assert summary1["skipped_low_ev"] == 3
-        assert summary1["skipped_insufficient_books"] == 1
-
-        pick = picks[0]
-        assert pick.side in {side.value for side in Side}
-        assert pick.side == Side.HOME.value
-        assert pick.source == "CONSENSUS"
-
-        expected_ev = ev_percent(0.53, 2.10)
-        expected_kelly = kelly_fraction(0.53, 2.10, kelly_multiplier=0.25, max_cap=0.05)
-
-        assert float(pick.ev) == round(expected_ev, 8)
-        assert float(pick.kelly_fraction) == round(expected_kelly, 8)
-        assert float(pick.stake) == round(10000.0 * expected_kelly, 4)
-
-        # Idempotent: same snapshots should not insert duplicate records.
-        summary2 = generate_consensus_picks(session, sport_key="basketball_nba", market_key="h2h")
-        assert summary2["inserted"] == 0
-        assert summary2["skipped_existing"] == 1
-        assert session.query(Pick).count() == 1
-
-
-def test_generate_picks_no_views_returns_empty_summary(monkeypatch) -> None:
-    monkeypatch.setenv("PICK_MIN_BOOKS", "3")
-    get_settings.cache_clear()
-
-    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
-    Base.metadata.create_all(engine)
-
-    with Session(engine) as session:
-        summary = generate_consensus_picks(session, sport_key="basketball_nba", market_key="h2h")
-        assert summary["total_views"] == 0
-        assert summary["inserted"] == 0
-        assert summary["candidates"] == 0
+        db_session.add(pick)
+        db_session.add(
+            PickScore(
+                pick_id=pick.id,
+                scored_at=now,
+                version=settings.pqs_version,
+                pqs=Decimal("0.70"),
+                components_json={},
+                features_json={},
+                decision=decision,
+                drop_reason=None,
+            )
+        )
+    db_session.commit()
+
+    rows = list_picks(db_session, sport_key="basketball_nba", market_key="h2h", date=None)
+
+    assert len(rows) == 1
+    row = rows[0]
+    assert row["side"] == "HOME"
+    assert row["event_id"] == "evt_list"
+    assert row["point"] is None
+    assert isinstance(row["best_decimal"], float)
+    assert row["best_decimal"] == 2.05
+    assert row["stake"] == 10.0
+    assert row["pqs"] == 0.7
+    assert row["pqs_decision"] == "KEEP"
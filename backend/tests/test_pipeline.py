@@ -1,120 +1,170 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
-from decimal import Decimal
+from unittest.mock import Mock, call
 
-from sqlalchemy import create_engine
+from sqlalchemy import event, func, select
 from sqlalchemy.orm import Session
 
-from app.config import get_settings
-from app.models import Base, Game, Pick, PipelineRun
+from app.config import Settings
+from app.models import Pick, PipelineRun
 from app.services import pipeline
+from tests._db import make_engine
+from tests._factories import insert_game, insert_picks, pick_row
+from tests._settings import use_settings
 
 
-def _game(session: Session, event_id: str, commence_time: datetime) -> Game:
-    game = Game(
-        sport_key="basketball_nba",
-        event_id=event_id,
-        commence_time=commence_time,
-        home_team="home",
-        away_team="away",
+def test_run_cycle_and_logging(monkeypatch, db_session: Session) -> None:
+    settings = use_settings(
+        monkeypatch,
+        odds_sports_whitelist=("basketball_nba", "icehockey_nhl"),
+        markets_autorun="h2h,totals",
     )
-    session.add(game)
-    session.flush()
-    return game
-
-
-def _pick(session: Session, game_id: int, created_at: datetime, clv_done: bool = False) -> Pick:
-    pick = Pick(
-        game_id=game_id,
-        created_at=created_at,
-        market_key="h2h",
-        side="HOME",
-        point=None,
-        source="CONSENSUS",
-        consensus_prob=Decimal("0.55000000"),
-        best_decimal=Decimal("2.00000"),
-        best_book="booka",
-        ev=Decimal("0.02000000"),
-        kelly_fraction=Decimal("0.01000000"),
-        stake=Decimal("10.0000"),
-        consensus_books=2,
-        sharp_books=0,
-        captured_at_min=created_at,
-        captured_at_max=created_at,
-        clv_computed_at=created_at if clv_done else None,
-    )
-    session.add(pick)
-    session.flush()
-    return pick
-
-
-def test_run_cycle_and_logging(monkeypatch) -> None:
-    monkeypatch.setenv("ODDS_SPORTS_WHITELIST", "basketball_nba,icehockey_nhl")
-    monkeypatch.setenv("MARKETS_AUTORUN", "h2h,totals")
-    get_settings.cache_clear()
-    settings = get_settings()
-
-    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
-    Base.metadata.create_all(engine)
 
     ingest_calls: list[str] = []
-    picks_calls: list[tuple[str, str]] = []
+    mock_generate = Mock(
+        return_value={"total_views": 1, "candidates": 1, "inserted": 1, "skipped_existing": 0, "skipped_low_ev": 0, "skipped_insufficient_books": 0}
+    )
 
     monkeypatch.setattr(
         pipeline,
         "ingest_odds_for_sport",
         lambda _session, sport: ingest_calls.append(sport) or {"games_upserted": 1, "groups_changed": 1, "snapshot_rows_inserted": 2, "groups_skipped": 0},
     )
-    monkeypatch.setattr(
-        pipeline,
-        "generate_consensus_picks",
-        lambda **kwargs: picks_calls.append((kwargs["sport_key"], kwargs["market_key"])) or {"total_views": 1, "candidates": 1, "inserted": 1, "skipped_existing": 0, "skipped_low_ev": 0, "skipped_insufficient_books": 0},
-    )
+    monkeypatch.setattr(pipeline, "generate_consensus_picks", mock_generate)
     monkeypatch.setattr(pipeline, "compute_pick_clv", lambda _session, _pick: False)
 
-    with Session(engine) as session:
-        summary = pipeline.run_cycle(session, settings)
-        runs = session.query(PipelineRun).all()
+    summary = pipeline.run_cycle(db_session, settings)
+    runs = db_session.execute(select(PipelineRun)).scalars().all()
 
     assert summary["errors_count"] == 0
     assert ingest_calls == ["basketball_nba", "icehockey_nhl"]
-    assert picks_calls == [
-        ("basketball_nba", "h2h"),
-        ("icehockey_nhl", "h2h"),
+    assert mock_generate.call_args_list == [
+        call(session=db_session, sport_key="basketball_nba", market_key="h2h"),
+        call(session=db_session, sport_key="icehockey_nhl", market_key="h2h"),
     ]
     assert len(runs) == 4
     assert sorted(run.run_type for run in runs) == ["clv", "cycle", "ingest", "picks"]
 
 
-def test_run_clv_only_due_picks(monkeypatch) -> None:
-    get_settings.cache_clear()
-    settings = get_settings()
-    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
-    Base.metadata.create_all(engine)
-
+def test_run_clv_only_due_picks(monkeypatch, db_session: Session, default_settings: Settings) -> None:
     now = datetime.now(timezone.utc)
-    with Session(engine) as session:
-        past_game = _game(session, "past", now - timedelta(hours=1))
-        future_game = _game(session, "future", now + timedelta(hours=1))
-        due_pick = _pick(session, past_game.id, now - timedelta(hours=2), clv_done=False)
-        due_pick_id = due_pick.id
-        _pick(session, past_game.id, now - timedelta(hours=2), clv_done=True)
-        _pick(session, future_game.id, now - timedelta(hours=2), clv_done=False)
-        session.commit()
+    created_at = now - timedelta(hours=2)
+    past_game = insert_game(db_session, event_id="past", commence_time=now - timedelta(hours=1))
+    future_game = insert_game(db_session, event_id="future", commence_time=now + timedelta(hours=1))
+    due_pick_id, _, _ = insert_picks(
+        db_session,
+        [
+            pick_row(past_game.id, created_at),
+            pick_row(past_game.id, created_at, clv_done=True),
+            pick_row(future_game.id, created_at),
+        ],
+    )
+    db_session.commit()
 
-        updated_ids: list[int] = []
+    updated_ids: list[int] = []
 
-        def fake_compute(_session: Session, pick: Pick) -> bool:
-            updated_ids.append(pick.id)
-            pick.clv_computed_at = datetime.now(timezone.utc)
-            return True
+    def fake_compute(_session: Session, pick: Pick) -> bool:
+        updated_ids.append(pick.id)
+        pick.clv_computed_at = datetime.now(timezone.utc)
+        return True
 
-        monkeypatch.setattr(pipeline, "compute_pick_clv", fake_compute)
+    monkeypatch.setattr(pipeline, "compute_pick_clv", fake_compute)
 
-        summary = pipeline.run_clv(session, settings)
+    summary = pipeline.run_clv(db_session, default_settings)
 
     assert summary["processed"] == 1
     assert summary["updated"] == 1
     assert due_pick_id in updated_ids
     assert len(updated_ids) == 1
+
+
+def test_run_ingest_with_workers_uses_a_session_per_sport(monkeypatch) -> None:
+    settings = use_settings(
+        monkeypatch,
+        odds_sports_whitelist=("basketball_nba", "icehockey_nhl", "americanfootball_ncaaf"),
+        ingest_max_workers=3,
+    )
+
+    engine = make_engine()
+    sessions_seen: dict[str, Session] = {}
+
+    def fake_ingest(sport_session: Session, sport: str) -> dict:
+        sessions_seen[sport] = sport_session
+        if sport == "icehockey_nhl":
+            raise ValueError("upstream timeout")
+        return {"games_upserted": 2, "groups_changed": 1, "snapshot_rows_inserted": 4, "groups_skipped": 1}
+
+    monkeypatch.setattr(pipeline, "ingest_odds_for_sport", fake_ingest)
+
+    with Session(engine) as session:
+        summary = pipeline.run_ingest(session, settings)
+
+    assert sorted(summary["per_sport"]) == ["americanfootball_ncaaf", "basketball_nba"]
+    assert summary["errors"] == {"icehockey_nhl": "upstream timeout"}
+    assert summary["games_upserted"] == 4
+    assert summary["snapshot_rows_inserted"] == 8
+    assert session not in sessions_seen.values()
+    assert len({id(worker) for worker in sessions_seen.values()}) == 3
+
+
+def test_dumps_sorted_writes_key_sorted_stdlib_json() -> None:
+    payload = {"b": {"z": 1, "a": [1.5, None]}, "a": "x"}
+
+    assert pipeline._dumps_sorted(payload) == '{"a": "x", "b": {"a": [1.5, null], "z": 1}}'
+
+
+def test_run_clv_streams_due_picks_across_batches(monkeypatch, db_session: Session, default_settings: Settings) -> None:
+    monkeypatch.setattr(pipeline, "CLV_BATCH_SIZE", 2)
+
+    now = datetime.now(timezone.utc)
+    past_game = insert_game(db_session, event_id="past", commence_time=now - timedelta(hours=1))
+    insert_picks(db_session, [pick_row(past_game.id, now - timedelta(hours=2, minutes=offset)) for offset in range(5)])
+    db_session.commit()
+
+    flushed_batches: list[int] = []
+
+    def fake_compute(_session: Session, pick: Pick) -> bool:
+        pick.clv_computed_at = datetime.now(timezone.utc)
+        return True
+
+    def record_flush(session: Session, _flush_context, _instances) -> None:
+        dirty_picks = sum(isinstance(obj, Pick) for obj in session.dirty)
+        if dirty_picks:
+            flushed_batches.append(dirty_picks)
+
+    monkeypatch.setattr(pipeline, "compute_pick_clv", fake_compute)
+    event.listen(db_session, "before_flush", record_flush)
+
+    summary = pipeline.run_clv(db_session, default_settings)
+    pending = db_session.execute(
+        select(func.count()).select_from(Pick).where(Pick.clv_computed_at.is_(None))
+    ).scalar_one()
+
+    assert summary["processed"] == 5
+    assert summary["updated"] == 5
+    # Each batch of two is written before the next one is fetched.
+    assert flushed_batches == [2, 2, 1]
+    assert pending == 0
+
+
+def test_latest_run_statuses_picks_newest_run_per_type(db_session: Session) -> None:
+
+    t0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    db_session.add_all(
+        [
+            PipelineRun(created_at=t0, run_type="ingest", status="error", error="boom"),
+            PipelineRun(created_at=t0 + timedelta(minutes=5), run_type="ingest", status="ok"),
+            PipelineRun(created_at=t0 + timedelta(minutes=1), run_type="picks", status="error", error="late"),
+            PipelineRun(created_at=t0 + timedelta(minutes=9), run_type="cycle", status="ok"),
+        ]
+    )
+    db_session.commit()
+
+    statuses = pipeline.latest_run_statuses(db_session)
+
+    assert statuses["ingest"]["status"] == "ok"
+    assert statuses["ingest"]["error"] is None
+    assert statuses["picks"]["error"] == "late"
+    assert statuses["clv"] is None
+    assert sorted(statuses) == ["clv", "ingest", "picks"]
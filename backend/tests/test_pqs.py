@@ -3,32 +3,55 @@ from __future__ import annotations
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 
-from sqlalchemy import create_engine
+import pytest
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
-from app.config import get_settings
 from app.domain.enums import Side
 from app.intelligence.features import PickFeatures, build_dispersion_inputs, compute_price_dispersion
-from app.intelligence.pqs import score_pick
+from app.intelligence.pqs import score_pick, score_picks
 from app.intelligence.priors import recompute_clv_sport_stats
-from app.models import Base, ClvSportStat, Game, OddsSnapshot, Pick
+from app.models import ClvSportStat, Game, OddsSnapshot, Pick, PickScore
 from app.services.picks import _select_final_keep_ids, generate_consensus_picks
+from tests._factories import insert_game
+from tests._settings import use_settings
+
+
+# (side, decimal, fair_prob, group_hash suffix) seeded for every book.
+_SEED_SIDES = (
+    ("HOME", Decimal("2.10"), Decimal("0.53"), "h"),
+    ("AWAY", Decimal("1.90"), Decimal("0.47"), "a"),
+)
+_SEED_IMPLIED_PROB = Decimal("0.50")
 
 
 def _seed_market(session: Session, event_id: str, commence_delta_min: int = 180) -> None:
-    game = Game(
-        sport_key="basketball_nba",
+    game = insert_game(
+        session,
         event_id=event_id,
         commence_time=datetime.now(timezone.utc) + timedelta(minutes=commence_delta_min),
-        home_team="home",
-        away_team="away",
     )
-    session.add(game)
-    session.flush()
     t0 = datetime.now(timezone.utc)
-    for idx, book in enumerate(["pinnacle", "book2", "book3", "book4", "book5", "book6"]):
-        session.add(OddsSnapshot(game_id=game.id,captured_at=t0,market_key="h2h",bookmaker=book,side="HOME",point=None,american=-110,decimal=Decimal("2.10"),implied_prob=Decimal("0.50"),fair_prob=Decimal("0.53"),group_hash=f"{event_id}-{idx}-h"))
-        session.add(OddsSnapshot(game_id=game.id,captured_at=t0,market_key="h2h",bookmaker=book,side="AWAY",point=None,american=-110,decimal=Decimal("1.90"),implied_prob=Decimal("0.50"),fair_prob=Decimal("0.47"),group_hash=f"{event_id}-{idx}-a"))
+    session.execute(
+        insert(OddsSnapshot),
+        [
+            {
+                "game_id": game.id,
+                "captured_at": t0,
+                "market_key": "h2h",
+                "bookmaker": book,
+                "side": side,
+                "point": None,
+                "american": -110,
+                "decimal": decimal,
+                "implied_prob": _SEED_IMPLIED_PROB,
+                "fair_prob": fair_prob,
+                "group_hash": f"{event_id}-{idx}-{suffix}",
+            }
+            for idx, book in enumerate(["pinnacle", "book2", "book3", "book4", "book5", "book6"])
+            for side, decimal, fair_prob, suffix in _SEED_SIDES
+        ],
+    )
 
 
 def _market_odds(home_decimals: list[float], away_decimals: list[float]) -> dict[str, dict[Side, float]]:
@@ -38,35 +61,29 @@ def _market_odds(home_decimals: list[float], away_decimals: list[float]) -> dict
     }
 
 
-def test_priors_weak_neutral(monkeypatch) -> None:
-    monkeypatch.setenv("CLV_MIN_N_FOR_PRIOR", "30")
-    monkeypatch.setenv("CLV_PRIOR_WINDOW", "200")
-    get_settings.cache_clear()
-    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
-    Base.metadata.create_all(engine)
-    with Session(engine) as session:
-        stats = recompute_clv_sport_stats(session, get_settings())
-        assert stats["inserted"] == 0
-
-
-def test_generate_picks_creates_scores(monkeypatch) -> None:
-    monkeypatch.setenv("CONSENSUS_MIN_BOOKS", "3")
-    monkeypatch.setenv("PICK_MIN_BOOKS", "3")
-    monkeypatch.setenv("MIN_BOOKS", "6")
-    monkeypatch.setenv("SHARP_BOOKS", "pinnacle")
-    monkeypatch.setenv("RUN_MAX_PICKS_TOTAL", "2")
-    get_settings.cache_clear()
-
-    engine = create_engine("sqlite+pysqlite:///:memory:", future=True)
-    Base.metadata.create_all(engine)
-    with Session(engine) as session:
-        _seed_market(session, "evt1")
-        _seed_market(session, "evt2")
-        session.commit()
-        summary = generate_consensus_picks(session, "basketball_nba", "h2h")
-        assert summary["scored"] >= 2
-        assert session.query(Pick).count() >= summary["inserted"]
-        assert session.query(ClvSportStat).count() == 0
+def test_priors_weak_neutral(monkeypatch, db_session: Session) -> None:
+    settings = use_settings(monkeypatch, clv_min_n_for_prior=30, clv_prior_window=200)
+    stats = recompute_clv_sport_stats(db_session, settings)
+    assert stats["inserted"] == 0
+
+
+def test_generate_picks_creates_scores(monkeypatch, db_session: Session) -> None:
+    use_settings(
+        monkeypatch,
+        consensus_min_books=3,
+        pick_min_books=3,
+        min_books=6,
+        sharp_books=("pinnacle",),
+        run_max_picks_total=2,
+    )
+
+    _seed_market(db_session, "evt1")
+    _seed_market(db_session, "evt2")
+    db_session.commit()
+    summary = generate_consensus_picks(db_session, "basketball_nba", "h2h")
+    assert summary["scored"] >= 2
+    assert db_session.query(Pick).count() >= summary["inserted"]
+    assert db_session.query(ClvSportStat).count() == 0
 
 
 def test_price_dispersion_tight_market_is_small() -> None:
@@ -127,9 +144,7 @@ def test_price_dispersion_extreme_two_way_market_stays_tight_per_side() -> None:
 
 
 def test_sane_candidate_passes_while_noisy_candidate_drops(monkeypatch) -> None:
-    monkeypatch.setenv("MAX_PRICE_DISPERSION", "0.12")
-    get_settings.cache_clear()
-    settings = get_settings()
+    settings = use_settings(monkeypatch, max_price_dispersion=0.12)
 
     base = dict(
         ev=0.03,
@@ -151,13 +166,11 @@ def test_sane_candidate_passes_while_noisy_candidate_drops(monkeypatch) -> None:
     assert sane_result.decision.value in {"KEEP", "WARN"}
     assert noisy_result.decision.value == "DROP"
     assert noisy_result.drop_reason == "max_price_dispersion"
+    assert score_picks(features=[sane, noisy], settings=settings, prior=None) == [sane_result, noisy_result]
 
 
 def test_adaptive_dispersion_allows_book_count_8_market(monkeypatch) -> None:
-    monkeypatch.delenv("MAX_PRICE_DISPERSION", raising=False)
-    monkeypatch.setenv("SPORT_DEFAULT_MIN_PQS", "0.0")
-    get_settings.cache_clear()
-    settings = get_settings()
+    settings = use_settings(monkeypatch, sport_default_min_pqs=0.0)
 
     features = PickFeatures(
         ev=0.03,
@@ -176,9 +189,7 @@ def test_adaptive_dispersion_allows_book_count_8_market(monkeypatch) -> None:
 
 
 def test_adaptive_dispersion_allows_sharp_high_ev_market(monkeypatch) -> None:
-    monkeypatch.setenv("SPORT_DEFAULT_MIN_PQS", "0.0")
-    get_settings.cache_clear()
-    settings = get_settings()
+    settings = use_settings(monkeypatch, sport_default_min_pqs=0.0)
 
     features = PickFeatures(
         ev=0.06,
@@ -197,9 +208,7 @@ def test_adaptive_dispersion_allows_sharp_high_ev_market(monkeypatch) -> None:
 
 
 def test_adaptive_dispersion_hard_ceiling_always_drops(monkeypatch) -> None:
-    monkeypatch.setenv("SPORT_DEFAULT_MIN_PQS", "0.0")
-    get_settings.cache_clear()
-    settings = get_settings()
+    settings = use_settings(monkeypatch, sport_default_min_pqs=0.0)
 
     features = PickFeatures(
         ev=0.10,
@@ -219,9 +228,7 @@ def test_adaptive_dispersion_hard_ceiling_always_drops(monkeypatch) -> None:
 
 
 def test_adaptive_min_minutes_to_start_relaxes_for_tight_well_covered_market(monkeypatch) -> None:
-    monkeypatch.setenv("SPORT_DEFAULT_MIN_PQS", "0.0")
-    get_settings.cache_clear()
-    settings = get_settings()
+    settings = use_settings(monkeypatch, sport_default_min_pqs=0.0)
 
     features = PickFeatures(
         ev=0.03,
@@ -251,3 +258,61 @@ def test_cap_throttle_deterministically_keeps_top_n_by_pqs() -> None:
     final_keep_ids = _select_final_keep_ids(kept_candidates, run_max_picks_total=10)
 
     assert final_keep_ids == {101, 102}
+
+
+def test_cap_throttle_skips_capped_sports_until_run_total_fills() -> None:
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    kept_candidates = [
+        (0.95, "basketball_nba", "h2h", "evt-1", "HOME", now, 201, 1),
+        (0.90, "basketball_nba", "h2h", "evt-2", "HOME", now, 202, 1),
+        (0.80, "icehockey_nhl", "h2h", "evt-3", "HOME", now, 203, 5),
+        (0.75, "icehockey_nhl", "h2h", "evt-4", "HOME", now, 204, 5),
+        (0.60, "icehockey_nhl", "h2h", "evt-5", "HOME", now, 205, 5),
+    ]
+
+    final_keep_ids = _select_final_keep_ids(kept_candidates, run_max_picks_total=3)
+
+    assert final_keep_ids == {201, 203, 204}
+
+
+def test_generate_picks_cap_throttles_scores_past_run_total(monkeypatch, db_session: Session) -> None:
+    use_settings(
+        monkeypatch,
+        consensus_min_books=3,
+        pick_min_books=3,
+        min_books=6,
+        sharp_books=("pinnacle",),
+        sport_default_min_pqs=0.0,
+        run_max_picks_total=1,
+    )
+
+    _seed_market(db_session, "evt1")
+    _seed_market(db_session, "evt2")
+    db_session.commit()
+    summary = generate_consensus_picks(db_session, "basketball_nba", "h2h")
+    decisions = sorted((score.decision, score.drop_reason) for score in db_session.query(PickScore))
+
+    assert summary["kept"] == 2
+    assert summary["inserted"] == 1
+    assert decisions == [("DROP", "cap_throttle"), ("KEEP", None)]
+
+
+def test_priors_insert_one_stat_row_per_sport_market(monkeypatch, db_session: Session) -> None:
+    settings = use_settings(monkeypatch, clv_min_n_for_prior=2, clv_prior_window=200)
+    now = datetime.now(timezone.utc)
+    game = Game(sport_key="basketball_nba", event_id="evt-prior", commence_time=now, home_team="home", away_team="away")
+    db_session.add(game)
+    db_session.flush()
+    for side, clv in [("HOME", "0.0100"), ("AWAY", "-0.0050"), ("HOME", "0.0200")]:
+        db_session.add(Pick(game_id=game.id, market_key="h2h", side=side, point=None, source="CONSENSUS", consensus_prob=Decimal("0.55"), best_decimal=Decimal("2.0"), best_book=f"book-{clv}", ev=Decimal("0.02"), kelly_fraction=Decimal("0.01"), stake=Decimal("10"), consensus_books=6, sharp_books=1, captured_at_min=now, captured_at_max=now, market_clv=Decimal(clv), clv_computed_at=now))
+    db_session.commit()
+
+    stats = recompute_clv_sport_stats(db_session, settings)
+    rows = db_session.query(ClvSportStat).all()
+
+    assert stats["inserted"] == 1
+    assert len(rows) == 1
+    assert rows[0].n == 3
+    assert rows[0].is_weak == 0
+    assert float(rows[0].mean_market_clv_bps) == pytest.approx(83.3333, abs=1e-4)
+    assert float(rows[0].pct_positive_market_clv) == pytest.approx(0.666667, abs=1e-6)
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.routing import APIRoute, serialize_response
+from sqlalchemy.orm import Session
+
+from app.api.odds import router as odds_router
+from app.api.odds import system_quota
+from app.api.pipeline import pipeline_health
+from app.api.pipeline import router as pipeline_router
+from app.services import quota
+
+
+def _response_field(router, path: str):
+    return next(route.response_field for route in router.routes if isinstance(route, APIRoute) and route.path == path)
+
+
+@pytest.fixture(autouse=True)
+def _reset_quota(monkeypatch) -> None:
+    monkeypatch.setattr(quota, "_quota_snapshot", ({}, None))
+
+
+def test_quota_endpoints_serialize_before_and_after_record(db_session: Session) -> None:
+    quota_field = _response_field(odds_router, "/system/quota")
+    health_field = _response_field(pipeline_router, "/pipeline/health")
+
+    empty = asyncio.run(serialize_response(field=quota_field, response_content=system_quota()))
+    assert empty == {"headers": {}, "fetched_at": None}
+
+    quota.record_quota({"x-requests-remaining": "42"}, datetime(2025, 1, 1, tzinfo=timezone.utc))
+
+    recorded = asyncio.run(serialize_response(field=quota_field, response_content=system_quota()))
+    assert recorded == {"headers": {"x-requests-remaining": "42"}, "fetched_at": "2025-01-01T00:00:00+00:00"}
+
+    health = asyncio.run(serialize_response(field=health_field, response_content=pipeline_health(db=db_session)))
+    assert health["quota"] == recorded
+
+
+def test_get_quota_state_returns_a_private_headers_copy() -> None:
+    quota.record_quota({"x-requests-remaining": "42"}, datetime(2025, 1, 1, tzinfo=timezone.utc))
+
+    quota.get_quota_state()["headers"]["x-requests-remaining"] = "0"
+
+    assert quota.get_quota_state()["headers"] == {"x-requests-remaining": "42"}
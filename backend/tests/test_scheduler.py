@@ -1,13 +1,11 @@
 from __future__ import annotations
 
-from app.config import get_settings
 from app.core import scheduler as sched
+from tests._settings import use_settings
 
 
 def test_scheduler_disabled(monkeypatch) -> None:
-    monkeypatch.setenv("ENABLE_SCHEDULER", "false")
-    get_settings.cache_clear()
-    settings = get_settings()
+    settings = use_settings(monkeypatch, enable_scheduler=False)
 
     started = sched.start_scheduler(settings)
     assert started is False
@@ -15,10 +13,7 @@ def test_scheduler_disabled(monkeypatch) -> None:
 
 
 def test_scheduler_skips_when_db_unreachable(monkeypatch) -> None:
-    monkeypatch.setenv("ENABLE_SCHEDULER", "true")
-    monkeypatch.setenv("SCHED_REQUIRE_DB", "true")
-    get_settings.cache_clear()
-    settings = get_settings()
+    settings = use_settings(monkeypatch, enable_scheduler=True, sched_require_db=True)
 
     monkeypatch.setattr(sched, "_can_reach_db", lambda: False)
 